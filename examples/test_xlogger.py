@@ -32,7 +32,7 @@ def test_advanced_query():
         }
 
         # Perform advanced query
-        logs = log_client.find_logs_advanced(**query_params)
+        logs = log_client.find_logs_advanced(**query_params, as_list=True)
 
         # Process results
         logger.info(f"Found {len(logs)} matching logs")
@@ -218,16 +218,20 @@ class XMedOCRServicer(xmedocr_pb2_grpc.XMedOCRServiceServicer):
         Implements the service interface defined in xmedocr.proto
     """
     
-    def __init__(self):
+    def __init__(self, executor: ThreadPoolExecutor = None):
         """
         Initializes the gRPC servicer with required components.
         
         Sets up:
         1. XMedOCR instance for document processing
         2. XOCR servicer for base OCR functionality
+        
+        Args:
+            executor (ThreadPoolExecutor, optional): Thread pool passed to the
+                XOCR servicer for model loading and inference
         """
         self.xmedocr = XMedOCR()
-        self.xocr_servicer = XOCRServicer()
+        self.xocr_servicer = XOCRServicer(executor)
     
     async def ProcessImage(self, request, context):
         """
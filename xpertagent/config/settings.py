@@ -96,9 +96,24 @@ class Settings:
     DEFAULT_MODEL = os.getenv("LLM_API_MODEL", "gpt-3.5-turbo")        # Default model name
 
     # API request settings with type conversion
-    API_LAST_REQUEST_TIME = get_env_float("LLM_API_LAST_REQUEST_TIME", 0)          # Last request timestamp
-    API_MIN_REQUEST_INTERVAL = get_env_float("LLM_API_MIN_REQUEST_INTERVAL", 1.0)  # Minimum seconds between requests
+    API_MIN_REQUEST_INTERVAL = get_env_float("LLM_API_MIN_REQUEST_INTERVAL", 1.0)  # Minimum seconds between requests (used when API_RPM is 0)
+    API_RPM = get_env_float("LLM_API_RPM", 0)                                      # Requests per minute (0 = derive from interval)
+    API_BURST = get_env_int("LLM_API_BURST", 1)                                    # Requests allowed in a burst
     API_MAX_RETRIES = get_env_int("LLM_API_MAX_RETRIES", 3)                        # Maximum retry attempts
+    API_TIMEOUT = get_env_float("LLM_API_TIMEOUT", 60.0)                           # Request timeout in seconds
+    API_MAX_CONNECTIONS = get_env_int("LLM_API_MAX_CONNECTIONS", 100)              # Connection pool size
+    API_MAX_KEEPALIVE_CONNECTIONS = get_env_int("LLM_API_MAX_KEEPALIVE_CONNECTIONS", 20)  # Idle keep-alive connections
+    LLM_PROMPT_CACHE_CONTROL = str(os.getenv("LLM_PROMPT_CACHE_CONTROL", "false")).lower() in ('true', '1', 'yes', 'on', 't')  # Add cache_control to system prompts
+
+    # LLM response cache settings (only temperature=0 requests are cached)
+    LLM_CACHE_ENABLE = str(os.getenv("LLM_CACHE_ENABLE", "false")).lower() in ('true', '1', 'yes', 'on', 't')  # Enable response cache
+    LLM_CACHE_TTL = get_env_float("LLM_CACHE_TTL", 3600.0)        # Cached response lifetime in seconds
+    LLM_CACHE_MAX_SIZE = get_env_int("LLM_CACHE_MAX_SIZE", 1024)  # Maximum in-memory cache entries
+    LLM_CACHE_REDIS_URL = os.getenv("LLM_CACHE_REDIS_URL")        # Optional Redis URL for a shared cache
+    LLM_SEMANTIC_CACHE_ENABLE = str(os.getenv("LLM_SEMANTIC_CACHE_ENABLE", "false")).lower() in ('true', '1', 'yes', 'on', 't')  # Enable embedding-based cache
+    LLM_SEMANTIC_CACHE_THRESHOLD = get_env_float("LLM_SEMANTIC_CACHE_THRESHOLD", 0.92)  # Minimum cosine similarity for a hit
+    LLM_SEMANTIC_CACHE_MAX_SIZE = get_env_int("LLM_SEMANTIC_CACHE_MAX_SIZE", 10000)    # Maximum entries per context
+    LLM_SEMANTIC_CACHE_EMBEDDING_MODEL = os.getenv("LLM_SEMANTIC_CACHE_EMBEDDING_MODEL", "text-embedding-3-small")  # Embedding model
     
     # Memory configuration
     MEMORY_COLLECTION = "xpertagent_memory"  # ChromaDB collection name
@@ -117,11 +132,19 @@ class Settings:
     XGRPC_SERVICE_HOST = os.getenv("XGRPC_SERVICE_HOST", "127.0.0.1")  # XpertAgent GRPC service host
     XGRPC_SERVICE_PORT = get_env_int("XGRPC_SERVICE_PORT", 7834)  # XpertAgent GRPC service port
 
+    # XOCR model configuration
+    XOCR_LOAD_IN_4BIT = str(os.getenv("XOCR_LOAD_IN_4BIT", "false")).lower() in ('true', '1', 'yes', 'on', 't')  # 4-bit (NF4) decoder weights
+    XOCR_WARMUP = str(os.getenv("XOCR_WARMUP", "false")).lower() in ('true', '1', 'yes', 'on', 't')  # Load model and run a dummy inference at startup
+    XOCR_ATTN_IMPLEMENTATION = os.getenv("XOCR_ATTN_IMPLEMENTATION", "sdpa")  # Decoder attention backend: sdpa, eager or flash_attention_2
+    XOCR_JPEG_DRAFT = str(os.getenv("XOCR_JPEG_DRAFT", "false")).lower() in ('true', '1', 'yes', 'on', 't')  # Let libjpeg downscale large JPEGs while decoding (changes model input pixels)
+
     # Logging configuration
     XLOGGER_LOG_VER = get_version()  # Log version
     XLOGGER_LOG_DIR = LOGS_PATH  # Log directory
     XLOGGER_LOG_FILENAME = "xlogger.log"  # Log file name
+    XLOGGER_LOG_LEVEL = os.getenv("XLOGGER_LEVEL", "DEBUG").upper()  # Minimum log level; lower-level calls are skipped
     XLOGGER_LOG_MONGODB_ENABLE = str(os.getenv("XLOGGER_MONGODB_ENABLE", "false")).lower() in ('true', '1', 'yes', 'on', 't')  # MongoDB logging enable
+    XLOGGER_LOG_MONGODB_QUEUE_MAX = get_env_int("XLOGGER_MONGODB_QUEUE_MAX", 100000)  # Pending MongoDB log records before new ones are dropped
     XLOGGER_LOG_MONGODB_CONFIG = {
         "user": os.getenv("XLOGGER_MONGODB_USER", "xpertagent_user"),
         "pass": os.getenv("XLOGGER_MONGODB_PASS", "xpertagent_pass"),
@@ -129,7 +152,11 @@ class Settings:
         "port": os.getenv("XLOGGER_MONGODB_PORT", "27017"),
         "dbnm": os.getenv("XLOGGER_MONGODB_DBNM", "xpertagent_db"),
         "clnm": os.getenv("XLOGGER_MONGODB_CLNM", "xpertagent_cl"),
-        "tbnm": os.getenv("XLOGGER_MONGODB_TBNM", "xpertagent_log")
+        "tbnm": os.getenv("XLOGGER_MONGODB_TBNM", "xpertagent_log"),
+        "write_concern": get_env_int("XLOGGER_MONGODB_WRITE_CONCERN", 0),  # 0 = unacknowledged (fire-and-forget) log writes
+        "max_pool_size": get_env_int("XLOGGER_MONGODB_MAX_POOL_SIZE", 64),  # Connection pool size
+        "compressors": os.getenv("XLOGGER_MONGODB_COMPRESSORS", "zstd,snappy,zlib"),  # Wire compression, in order of preference
+        "zlib_level": get_env_int("XLOGGER_MONGODB_ZLIB_LEVEL", 3)  # zlib level, used when zstd/snappy are unavailable
     }
 
     # Dingtalk configurations
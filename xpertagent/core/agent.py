@@ -60,23 +60,24 @@ class XpertAgent:
             # Get available tools description
             tools_desc = tool_registry.get_tool_descriptions()
             
-            # Construct prompt
-            prompt = f"""Input: 
-{input_text}
-            
-Relevant Memories:
-{chr(10).join(relevant_memories)}
-
-Available Tools:
+            # Construct prompt (static instructions first, per-call values last,
+            # so the shared prefix can be reused by provider prompt caching)
+            prompt = f"""Available Tools:
 {tools_desc}
 
-Previous Result: {last_result if last_result is not None else 'None'}
-
 Analyze the situation and decide the next action. Response must be in JSON format:
 {{"thought": "your reasoning", 
     "action": "tool_name or 'respond'", 
     "action_input": "input for tool or response",
     "task_complete": true/false}}
+
+Input: 
+{input_text}
+            
+Relevant Memories:
+{chr(10).join(relevant_memories)}
+
+Previous Result: {last_result if last_result is not None else 'None'}
 """
             
             # Get LLM response
@@ -72,14 +72,14 @@ Plan:
 - Transform to JSON format
 - Return formatted result
 
-Current goal: {goal}
-Additional context: {context}
-
 Create a minimal, executable plan focusing only on necessary steps.
 Format each step as a numbered list:
 1. Step one
 2. Step two
 ...
+
+Current goal: {goal}
+Additional context: {context}
 """
         
         try:
@@ -130,13 +130,7 @@ Format each step as a numbered list:
         """
         current_plan = "\n".join([t.description for t in tasks])
         
-        prompt = f"""Current plan:
-{current_plan}
-
-Feedback:
-{feedback}
-
-Please optimize this plan following these principles:
+        prompt = f"""Please optimize the plan below following these principles:
 1. Keep steps minimal and programmatic
 2. Focus on automated operations
 3. Remove any manual/human steps
@@ -147,6 +141,12 @@ Return the optimized steps in numbered format:
 1. Step one
 2. Step two
 ...
+
+Current plan:
+{current_plan}
+
+Feedback:
+{feedback}
 """
         
         try:
@@ -129,15 +129,17 @@ class XService:
             Dynamically imports and registers gRPC servicers
         """
         if service_name == "xocr":
-            from xpertagent.tools.xpert_ocr.xocr_service import XOCRServicer
+            from xpertagent.tools.xpert_ocr.xocr_service import XOCRServicer, warmup_xocr_model
             from xpertagent.protos import xocr_pb2_grpc
-            servicer = XOCRServicer()
+            servicer = XOCRServicer(self.executor)
+            if settings.XOCR_WARMUP:
+                await warmup_xocr_model(self.executor)
             xocr_pb2_grpc.add_XOCRServiceServicer_to_server(servicer, self._server)
             logger.info("XOCR gRPC service initialized")
         elif service_name == "xmedocr":
             from xpertagent.apps.XMedOCR.XMedOCR import XMedOCRServicer
             from xpertagent.protos import xmedocr_pb2_grpc
-            servicer = XMedOCRServicer()
+            servicer = XMedOCRServicer(self.executor)
             xmedocr_pb2_grpc.add_XMedOCRServiceServicer_to_server(servicer, self._server)
             logger.info("XMedOCR gRPC service initialized")
     
@@ -281,9 +283,7 @@ class XService:
                     logger.warning("XMedOCR requires XOCR, you enabled XMedOCR but not XOCR, the latter will be automatically enabled.")
                     services.append("xocr")
 
-                # Initialize all services
-                logger.info(f"Initializing services: {services}")
-                for service in services:
+                async def _init_one(service: str):
                     try:
                         logger.info(f"Attempting to initialize service: {service}")
                         await self.init_service(service)
@@ -293,6 +293,10 @@ class XService:
                         logger.error(traceback.format_exc())
                         raise
 
+                # Initialize all services concurrently (duplicates removed, order kept)
+                logger.info(f"Initializing services: {services}")
+                await asyncio.gather(*(_init_one(service) for service in dict.fromkeys(services)))
+
                 if self.service_type == "http":
                     # Configure and start HTTP server
                     config = uvicorn.Config(
@@ -321,6 +325,10 @@ class XService:
             finally:
                 if self.service_type == "grpc" and self._server:
                     await self._server.stop(0)
+                # Release pooled download connections while the loop is still running
+                if self._services["xocr"] or self._services["xmedocr"]:
+                    from xpertagent.tools.xpert_ocr.xocr_service import close_http_client
+                    await close_http_client()
 
         # Create and configure event loop
         loop = asyncio.new_event_loop()
@@ -12,6 +12,7 @@ Key Components:
 - Image preprocessing pipeline
 - Asynchronous request handling
 - Resource-efficient singleton pattern
+- Lazy model loading on first request
 
 Technical Features:
 - CUDA-accelerated inference
@@ -23,28 +24,35 @@ Technical Features:
 import os
 import io
 import torch
+import httpx
+import orjson
 import asyncio
-import requests
+import threading
 import traceback
 
+from typing import Dict, Optional
 from PIL import Image
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request, APIRouter
-from pydantic import BaseModel
+from fastapi import Request, APIRouter
 from GOT.model import GOTQwenForCausalLM
-from transformers import AutoTokenizer
-from GOT.utils.utils import disable_torch_init, KeywordsStoppingCriteria
+from transformers import AutoTokenizer, BitsAndBytesConfig, StoppingCriteria
+from GOT.utils.utils import disable_torch_init
 from fastapi.responses import JSONResponse
 from xpertagent.protos import xocr_pb2, xocr_pb2_grpc
 from concurrent.futures import ThreadPoolExecutor
 from GOT.utils.conversation import conv_templates, SeparatorStyle
 from xpertagent.utils.helpers import http_response, RESPONSE_STATUS_SUCCESS, RESPONSE_STATUS_FAILED
 from xpertagent.utils.xlogger import logger
+from xpertagent.config.settings import settings
 from GOT.model.plug.blip_process import BlipImageEvalProcessor
 
 # Load environment configuration
 load_dotenv()
 
+# Let the CUDA caching allocator grow segments in place instead of
+# fragmenting across varying KV-cache sizes (must be set before CUDA init)
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
+
 # Configure base application path
 XAPP_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
@@ -54,9 +62,33 @@ DEFAULT_IMAGE_PATCH_TOKEN = '<imgpad>'
 DEFAULT_IM_START_TOKEN = '<img>'
 DEFAULT_IM_END_TOKEN = '</img>'
 
+# Image input configuration
+IMAGE_SIZE = 1024
+MAX_IMG_BYTES = 32 * 1024 * 1024  # 32MB
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # 64KB
+
+class StopTokenCriteria(StoppingCriteria):
+    """
+    Stops generation once the output ends with a given token id sequence.
+    
+    Unlike GOT's `KeywordsStoppingCriteria`, this never decodes the output,
+    so the per-step check stays O(1) instead of re-decoding every token.
+    """
+    
+    def __init__(self, stop_ids: torch.Tensor):
+        """
+        Args:
+            stop_ids (torch.Tensor): 1-D token ids of the stop string, on the model device
+        """
+        self.stop_ids = stop_ids
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> bool:
+        n = self.stop_ids.shape[0]
+        return input_ids.shape[1] >= n and torch.equal(input_ids[0, -n:], self.stop_ids)
+
 class XOCRModel:
     """
-    XOCR Model wrapper implementing singleton pattern.
+    XOCR Model wrapper implementing a per-path singleton pattern.
     
     This class provides:
     1. Thread-safe model inference
@@ -65,27 +97,35 @@ class XOCRModel:
     4. CUDA acceleration support
     
     Attributes:
-        _instance (XOCRModel): Singleton instance
-        _lock (asyncio.Lock): Thread synchronization lock
-        _initialized (bool): Initialization status flag
+        _instances (Dict[str, XOCRModel]): Loaded model instances keyed by model path
+        _cls_lock (threading.Lock): Guards instance creation across threads
+        _lock (threading.Lock): Inference synchronization lock
     """
-    _instance = None
-    _lock = asyncio.Lock()
-    _initialized = False
+    _instances: Dict[str, "XOCRModel"] = {}
+    _cls_lock = threading.Lock()
+    _lock = threading.Lock()
     
-    def __new__(cls, model_name: str):
+    @classmethod
+    def get(cls, model_name: str) -> "XOCRModel":
         """
-        Implements singleton pattern for model instance.
+        Returns the model instance for a path, loading it on first use.
         
         Args:
             model_name (str): Path to the pre-trained model
             
         Returns:
-            XOCRModel: Singleton model instance
+            XOCRModel: Shared model instance for `model_name`
+            
+        Note:
+            Creation happens under a class-level lock, so concurrent first
+            callers never load the same weights twice
         """
-        if cls._instance is None:
-            cls._instance = super(XOCRModel, cls).__new__(cls)
-        return cls._instance
+        with cls._cls_lock:
+            instance = cls._instances.get(model_name)
+            if instance is None:
+                instance = cls(model_name)
+                cls._instances[model_name] = instance
+            return instance
     
     def __init__(self, model_name: str):
         """
@@ -95,28 +135,61 @@ class XOCRModel:
             model_name (str): Path to the pre-trained model
             
         Note:
-            Configures model for CUDA acceleration and FP16 precision
+            Configures model for CUDA acceleration and FP16 precision,
+            with optional NF4 decoder weights (`XOCR_LOAD_IN_4BIT`) and
+            fused SDPA attention by default (`XOCR_ATTN_IMPLEMENTATION`).
+            Use `XOCRModel.get` instead of instantiating directly.
         """
-        if self._initialized:
-            return
-            
+        self.model_name = model_name
         disable_torch_init()
         self.tokenizer = AutoTokenizer.from_pretrained(model_name, trust_remote_code=True)
+
+        # Optionally quantize the Qwen decoder to 4-bit; the vision tower,
+        # projector and LM head stay in half precision
+        load_kwargs = {}
+        if settings.XOCR_LOAD_IN_4BIT:
+            load_kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_compute_dtype=torch.bfloat16,
+                bnb_4bit_quant_type="nf4",
+                llm_int8_skip_modules=["vision_tower_high", "mm_projector_vary", "lm_head"]
+            )
+
         self.model = GOTQwenForCausalLM.from_pretrained(
             model_name, 
             low_cpu_mem_usage=True,
             device_map='cuda',
             use_safetensors=True,
-            torch_dtype=torch.float16
+            torch_dtype=torch.float16,
+            attn_implementation=settings.XOCR_ATTN_IMPLEMENTATION,
+            **load_kwargs
         ).eval()
         
-        self.image_processor = BlipImageEvalProcessor(image_size=1024)
-        self.image_processor_high = BlipImageEvalProcessor(image_size=1024)
-        self._initialized = True
+        self.image_processor = BlipImageEvalProcessor(image_size=IMAGE_SIZE)
+
+        # Reusable pinned host and device buffers for the image upload
+        self._host_buf = torch.empty((1, 3, IMAGE_SIZE, IMAGE_SIZE), dtype=torch.float16, pin_memory=True)
+        self._dev_buf = torch.empty_like(self._host_buf, device='cuda')
 
-    async def process_image(self, image: Image.Image) -> str:
+        # The XOCR prompt is identical for every request: build and tokenize it once
+        qs = 'OCR: '  # DONOT CHANGE THIS PROMPT!
+
+        # Add image tokens to the prompt
+        qs = f"{DEFAULT_IM_START_TOKEN}{DEFAULT_IMAGE_PATCH_TOKEN*256}{DEFAULT_IM_END_TOKEN}\n{qs}"
+
+        # Prepare conversation template
+        conv = conv_templates["mpt"].copy()
+        conv.append_message(conv.roles[0], qs)
+        conv.append_message(conv.roles[1], None)
+        self._prompt = conv.get_prompt()
+        self._stop_str = conv.sep if conv.sep_style != SeparatorStyle.TWO else conv.sep2
+        self._input_ids = torch.as_tensor(self.tokenizer([self._prompt]).input_ids).cuda()
+        self._stop_ids = torch.as_tensor(self.tokenizer(self._stop_str).input_ids).cuda()
+        self._stopping_criteria = StopTokenCriteria(self._stop_ids)
+
+    def process_image(self, image: Image.Image) -> str:
         """
-        Processes image and generates OCR results asynchronously.
+        Processes image and generates OCR results.
         
         This method:
         1. Prepares image and model inputs
@@ -133,43 +206,27 @@ class XOCRModel:
             Exception: For any processing or inference errors
             
         Note:
-            Thread-safe execution through asyncio lock
+            Blocking call; run it in a worker thread from async code.
+            Thread-safe execution through a threading lock.
         """
-        async with self._lock:
+        with self._lock:
             try:
-                # Set XOCR prompt
-                qs = 'OCR: '  # DONOT CHANGE THIS PROMPT!
-
-                # Add image tokens to the prompt
-                qs = f"{DEFAULT_IM_START_TOKEN}{DEFAULT_IMAGE_PATCH_TOKEN*256}{DEFAULT_IM_END_TOKEN}\n{qs}"
-
-                # Prepare conversation template
-                conv = conv_templates["mpt"].copy()
-                conv.append_message(conv.roles[0], qs)
-                conv.append_message(conv.roles[1], None)
-                prompt = conv.get_prompt()
-
-                # Process inputs
-                inputs = self.tokenizer([prompt])
-                image_tensor = self.image_processor(image)
-                image_tensor_1 = self.image_processor_high(image)
-                input_ids = torch.as_tensor(inputs.input_ids).cuda()
-
-                # Set stopping criteria
-                stop_str = conv.sep if conv.sep_style != SeparatorStyle.TWO else conv.sep2
-                stopping_criteria = KeywordsStoppingCriteria([stop_str], self.tokenizer, input_ids)
-
-                # Generate results
-                with torch.autocast("cuda", dtype=torch.bfloat16):
+                # Process inputs (prompt ids are pre-tokenized in __init__)
+                input_ids = self._input_ids
+                self._host_buf[0].copy_(self.image_processor(image))
+                image_tensor = self._dev_buf.copy_(self._host_buf, non_blocking=True)
+
+                # Generate results (inference mode skips autograd version tracking)
+                with torch.inference_mode(), torch.autocast("cuda", dtype=torch.bfloat16):
                     output_ids = self.model.generate(
                         input_ids,
-                        images=[(image_tensor.unsqueeze(0).half().cuda(), 
-                                image_tensor_1.unsqueeze(0).half().cuda())],
+                        # Both inputs come from the same 1024px processor, so share one tensor
+                        images=[(image_tensor, image_tensor)],
                         do_sample=False,
                         num_beams=1,
                         no_repeat_ngram_size=20,
                         max_new_tokens=4096,
-                        stopping_criteria=[stopping_criteria],
+                        stopping_criteria=[self._stopping_criteria],
 
                         pad_token_id=self.tokenizer.pad_token_id,
                         eos_token_id=self.tokenizer.eos_token_id,
@@ -178,10 +235,14 @@ class XOCRModel:
                         # Setting `pad_token_id` to `eos_token_id`:151643 for open-end generation.
                     )
 
-                # Decode and clean up the output
-                outputs = self.tokenizer.decode(output_ids[0, input_ids.shape[1]:]).strip()
-                if outputs.endswith(stop_str):
-                    outputs = outputs[:-len(stop_str)]
+                # Strip the stop tokens by count, then decode once
+                generated_ids = output_ids[0, input_ids.shape[1]:]
+                n_stop = self._stop_ids.shape[0]
+                if generated_ids.shape[0] >= n_stop and torch.equal(generated_ids[-n_stop:], self._stop_ids):
+                    generated_ids = generated_ids[:-n_stop]
+                outputs = self.tokenizer.decode(generated_ids).strip()
+                if outputs.endswith(self._stop_str):
+                    outputs = outputs[:-len(self._stop_str)]
                     
                 return outputs.strip()
 
@@ -189,6 +250,37 @@ class XOCRModel:
                 logger.error(f"Error processing image: {str(e)}")
                 raise
 
+# Shared HTTP clients for image downloads, one per event loop (created on first use)
+_http_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+def _get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared async HTTP client of the running event loop.
+    
+    Returns:
+        httpx.AsyncClient: Pooled client reusing keep-alive connections
+        
+    Note:
+        Pooled connections are bound to the loop that opened them, so each
+        loop gets its own client; clients of closed loops are discarded
+    """
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        for stale_loop in [l for l in _http_clients if l.is_closed()]:
+            del _http_clients[stale_loop]
+        client = _http_clients[loop] = httpx.AsyncClient(timeout=10, follow_redirects=True)
+    return client
+
+async def close_http_client():
+    """
+    Closes the image download client of the running event loop.
+    Called on service shutdown, while the loop is still running.
+    """
+    client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
 async def download_image(url: str) -> Image.Image:
     """
     Downloads and validates image from URL.
@@ -200,15 +292,36 @@ async def download_image(url: str) -> Image.Image:
         Image.Image: PIL Image object
         
     Raises:
+        ValueError: If the image exceeds `MAX_IMG_BYTES`
         Exception: If download fails or image is invalid
         
     Note:
-        Implements timeout and error handling
+        Streams the body in chunks over a shared keep-alive client and rejects
+        oversized responses early, so per-request memory stays bounded by
+        `MAX_IMG_BYTES`
     """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return Image.open(io.BytesIO(response.content))
+        async with _get_http_client().stream("GET", url) as response:
+            response.raise_for_status()
+
+            # Reject oversized images before reading the body
+            content_length = int(response.headers.get("Content-Length", 0))
+            if content_length > MAX_IMG_BYTES:
+                raise ValueError(f"Image too large: {content_length} bytes (max {MAX_IMG_BYTES})")
+
+            buf = bytearray()
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                buf.extend(chunk)
+                if len(buf) > MAX_IMG_BYTES:
+                    raise ValueError(f"Image too large: more than {MAX_IMG_BYTES} bytes")
+
+        image = Image.open(io.BytesIO(buf))
+        if settings.XOCR_JPEG_DRAFT:
+            # Opt-in: let the JPEG decoder scale down towards the model input size.
+            # Faster for large photos, but the pixels differ from a full decode
+            # followed by the model's bicubic resize
+            image.draft("RGB", (IMAGE_SIZE, IMAGE_SIZE))
+        return image.convert("RGB")
     except Exception as e:
         logger.error(f"Error downloading image: {str(e)}")
         raise
@@ -224,14 +337,66 @@ def init_xocr_model() -> XOCRModel:
         Exception: If model initialization fails
         
     Note:
-        Uses singleton pattern for resource efficiency
+        Uses per-path singleton pattern for resource efficiency
     """
     model_path = os.path.join(XAPP_PATH, "data/models/GOT-OCR2_0")
     logger.info(f">>> Initializing XOCR model: `{model_path}`...")
-    model = XOCRModel(model_path)
+    model = XOCRModel.get(model_path)
     logger.info(f">>> XOCR Model initialized: `{model_path}`!")
     return model
 
+# Lazily loaded model shared by the HTTP router and the gRPC servicer
+_xocr_model: Optional[XOCRModel] = None
+_xocr_model_lock = asyncio.Lock()
+_xocr_warmed_up = False
+
+async def get_xocr_model(executor: ThreadPoolExecutor = None) -> XOCRModel:
+    """
+    Returns the XOCR model, loading it on first call.
+    
+    Args:
+        executor (ThreadPoolExecutor, optional): Thread pool used to load the model
+        
+    Returns:
+        XOCRModel: Initialized model instance
+        
+    Note:
+        Loading runs off the event loop and under a lock, so concurrent
+        first requests trigger exactly one model load
+    """
+    global _xocr_model
+    async with _xocr_model_lock:
+        if _xocr_model is None:
+            loop = asyncio.get_running_loop()
+            _xocr_model = await loop.run_in_executor(executor, init_xocr_model)
+    return _xocr_model
+
+async def warmup_xocr_model(executor: ThreadPoolExecutor = None) -> XOCRModel:
+    """
+    Loads the XOCR model and runs one dummy inference.
+    
+    Args:
+        executor (ThreadPoolExecutor, optional): Thread pool used for loading and inference
+        
+    Returns:
+        XOCRModel: Initialized, warmed-up model instance
+        
+    Note:
+        The dummy pass primes cuBLAS workspaces, attention kernels and the
+        CUDA allocator pool so the first real request does not pay for them.
+        Only the first call runs the inference.
+    """
+    global _xocr_warmed_up
+    model = await get_xocr_model(executor)
+    async with _xocr_model_lock:
+        if not _xocr_warmed_up:
+            logger.info(">>> Warming up XOCR model...")
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(executor, model.process_image, Image.new('RGB', (IMAGE_SIZE, IMAGE_SIZE)))
+            _xocr_warmed_up = True
+            logger.info(">>> XOCR model warmed up!")
+    return model
+
 async def get_xocr_router(executor: ThreadPoolExecutor = None) -> APIRouter:
     """
     Creates and configures XOCR FastAPI router.
@@ -248,8 +413,10 @@ async def get_xocr_router(executor: ThreadPoolExecutor = None) -> APIRouter:
     logger.info(">>> Initializing XOCR service...")
     router = APIRouter(prefix="/xocr", tags=["XOCR Services"])
     
-    # Initialize model instance
-    model = init_xocr_model()
+    # Model is loaded on first request (or via `/xocr/warmup`), unless
+    # startup warmup is enabled
+    if settings.XOCR_WARMUP:
+        await warmup_xocr_model(executor)
     
     async def process_xocr_request(data: dict) -> str:
         """
@@ -265,9 +432,29 @@ async def get_xocr_router(executor: ThreadPoolExecutor = None) -> APIRouter:
             Can be called directly or via API endpoint
         """
         image = await download_image(data["img_url"])
-        result = await model.process_image(image)
+        model = await get_xocr_model(executor)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(executor, model.process_image, image)
         return result
     
+    @router.post("/warmup")
+    async def xocr_warmup_endpoint() -> JSONResponse:
+        """
+        HTTP endpoint for explicitly preloading and warming up the XOCR model.
+        
+        Returns:
+            JSONResponse: Warmup status or error message
+        """
+        try:
+            await warmup_xocr_model(executor)
+            return JSONResponse(content=http_response(True, "XOCR model loaded", ""))
+        except Exception as e:
+            logger.error(f"XOCR Warmup Error: `{str(e)}`")
+            return JSONResponse(
+                status_code=500,
+                content=http_response(False, str(e), "")
+            )
+    
     @router.post("/process")
     async def xocr_endpoint(request: Request) -> JSONResponse:
         """
@@ -283,10 +470,12 @@ async def get_xocr_router(executor: ThreadPoolExecutor = None) -> APIRouter:
             Implements comprehensive error handling
         """
         try:
-            json_data = await request.json()
-            logger.info(f"XOCR HTTP Request: `{json_data}`")
+            json_data = orjson.loads(await request.body())
+            if not isinstance(json_data, dict) or not isinstance(json_data.get("img_url"), str):
+                raise ValueError("Request body must be a JSON object with a string `img_url`")
+            logger.info(f"XOCR HTTP Request: `{json_data['img_url']}`")
             result = await process_xocr_request(json_data)
-            logger.info(f"XOCR HTTP Response: `{result}`")
+            logger.debug("XOCR HTTP Response", data={"result": result})
             return JSONResponse(content=http_response(True, result, ""))
         except Exception as e:
             logger.error(f"XOCR HTTP Error: `{str(e)}`")
@@ -310,14 +499,16 @@ class XOCRServicer(xocr_pb2_grpc.XOCRServiceServicer):
     4. Status reporting through protobuf
     """
     
-    def __init__(self):
+    def __init__(self, executor: ThreadPoolExecutor = None):
         """
-        Initializes the gRPC servicer with model instance.
+        Initialize the servicer.
         
-        Note:
-            Uses shared model instance through singleton pattern
+        Args:
+            executor (ThreadPoolExecutor, optional): Thread pool for model loading
+                and inference, shared with the HTTP service
         """
-        self.model = init_xocr_model()
+        super().__init__()
+        self.executor = executor
     
     async def ProcessImage(self, request, context):
         """
@@ -330,14 +521,16 @@ class XOCRServicer(xocr_pb2_grpc.XOCRServiceServicer):
         Returns:
             xocr_pb2.XOCRResponse: Response with results or error
         """
-        logger.info(f"XOCR gRPC Request: `{request}`")
+        logger.info(f"XOCR gRPC Request: `{request.img_url}`")
         try:
             # Process image
             image = await download_image(request.img_url)
-            result = await self.model.process_image(image)
+            model = await get_xocr_model(self.executor)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, model.process_image, image)
             
             # Return successful response
-            logger.info(f"XOCR gRPC Response: `{result}`")
+            logger.debug("XOCR gRPC Response", data={"result": result})
             return xocr_pb2.XOCRResponse(
                 success=True,
                 status=RESPONSE_STATUS_SUCCESS,
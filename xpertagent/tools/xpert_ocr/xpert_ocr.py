@@ -8,9 +8,10 @@ import re
 import json
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Tuple, List
 from pathlib import Path
-from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 from urllib3.exceptions import InsecureRequestWarning
 from xpertagent.tools.base import BaseTool, ToolResult
 from xpertagent.utils.xlogger import logger
@@ -22,6 +23,16 @@ requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 # Global variable
 service_name = "xpert_ocr"
 
+# Image URL pattern: scheme + host + path ending in an image extension,
+# optionally followed by a query string or fragment
+_IMAGE_URL_PATTERN = re.compile(
+    r'(?:https?|ftp)://[^\s/?#]+/[^\s?#]*\.(?:jpe?g|png|gif|bmp|webp|tiff)(?:[?#]\S*)?(?!\S)',
+    re.IGNORECASE
+)
+
+# Supported local image file suffixes
+_LOCAL_IMAGE_SUFFIXES = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.webp'})
+
 class XpertOCRTool(BaseTool):
     """
     A tool for performing XOCR on images using the XpertOCR service.
@@ -36,6 +47,16 @@ class XpertOCRTool(BaseTool):
         self.service_url = f"http://127.0.0.1:{settings.XHTTP_SERVICE_PORT}/xocr/process"
         self.max_retries = 3
         self.retry_delay = 2
+        self.max_verify_workers = 16
+        self.max_ocr_workers = 4
+
+        # Pooled HTTP session reused across calls to keep connections alive
+        # (HEAD checks on image hosts and POSTs to the local XOCR service)
+        self._session = requests.Session()
+        self._session.verify = False
+        adapter = HTTPAdapter(pool_connections=self.max_verify_workers, pool_maxsize=self.max_verify_workers)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
         #self._check_service()
 
     def extract_image_urls(self, text: str) -> List[str]:
@@ -48,21 +69,7 @@ class XpertOCRTool(BaseTool):
         Returns:
             List[str]: List of extracted image URLs
         """
-        image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff')
-        protocols = ('http://', 'https://', 'ftp://')
-        url_pattern = r'(?:http|https|ftp)://[^\s]+'
-        
-        potential_urls = re.findall(url_pattern, text)
-        image_urls = []
-        
-        for url in potential_urls:
-            parsed_url = urlparse(url)
-            path = parsed_url.path.lower()
-            if (url.lower().startswith(protocols) and 
-                any(path.endswith(ext) for ext in image_extensions)):
-                image_urls.append(url)
-        
-        return image_urls
+        return _IMAGE_URL_PATTERN.findall(text)
 
     def verify_image_urls(self, urls: List[str]) -> Tuple[List[str], List[str]]:
         """
@@ -76,25 +83,23 @@ class XpertOCRTool(BaseTool):
         """
         valid_urls = []
         invalid_urls = []
+        if not urls:
+            return valid_urls, invalid_urls
+
+        def is_accessible(url: str) -> bool:
+            try:
+                response = self._session.head(url, timeout=5)
+            except requests.RequestException:
+                return False
+            try:
+                return response.status_code == 200
+            finally:
+                response.close()
         
-        session = requests.Session()
-        session.verify = False
-        
-        try:
-            for url in urls:
-                try:
-                    response = session.head(url, timeout=5)
-                    if response.status_code == 200:
-                        valid_urls.append(url)
-                    else:
-                        invalid_urls.append(url)
-                except requests.RequestException:
-                    invalid_urls.append(url)
-                finally:
-                    if 'response' in locals():
-                        response.close()
-        finally:
-            session.close()
+        # Issue all HEAD requests concurrently instead of one after another
+        with ThreadPoolExecutor(max_workers=min(len(urls), self.max_verify_workers)) as executor:
+            for url, accessible in zip(urls, executor.map(is_accessible, urls)):
+                (valid_urls if accessible else invalid_urls).append(url)
         
         return valid_urls, invalid_urls
 
@@ -126,23 +131,25 @@ class XpertOCRTool(BaseTool):
                 "result": []
             }
         
-        # Perform XOCR on valid URLs
+        # Perform XOCR on valid URLs concurrently
         results = []
         ocr_errors = []
         
-        for url in valid_urls:
-            try:
-                ocr_result = self.execute(url)
-                if ocr_result.success:
-                    results.append({
-                        "img_url": url,
-                        "ocr_result": ocr_result.result
-                    })
-                else:
+        with ThreadPoolExecutor(max_workers=min(len(valid_urls), self.max_ocr_workers)) as executor:
+            futures = [executor.submit(self.execute, url) for url in valid_urls]
+            for url, future in zip(valid_urls, futures):
+                try:
+                    ocr_result = future.result()
+                    if ocr_result.success:
+                        results.append({
+                            "img_url": url,
+                            "ocr_result": ocr_result.result
+                        })
+                    else:
+                        ocr_errors.append(url)
+                except Exception as e:
                     ocr_errors.append(url)
-            except Exception as e:
-                ocr_errors.append(url)
-                logger.error(f"Error processing URL {url}: {str(e)}")
+                    logger.error(f"Error processing URL {url}: {str(e)}")
         
         # Generate return results
         if not results:
@@ -224,15 +231,14 @@ class XpertOCRTool(BaseTool):
             
         Returns:
             ToolResult: XOCR processing result
+            
+        Note:
+            No client-side HEAD check is made here; the service downloads
+            the image itself and reports inaccessible URLs as errors
         """
         try:
-            # Verify URL accessibility
-            valid_urls, _ = self.verify_image_urls([url])
-            if not valid_urls:
-                return self.handle_error(ValueError("Image URL is not accessible"))
-
             # Send XOCR request
-            response = requests.post(
+            response = self._session.post(
                 self.service_url,
                 json={"img_url": url},
                 headers={
@@ -279,7 +285,7 @@ class XpertOCRTool(BaseTool):
                 }
                 
                 # Send request
-                response = requests.post(
+                response = self._session.post(
                     self.service_url,
                     json=test_payload,
                     headers=headers,
@@ -331,6 +337,13 @@ class XpertOCRTool(BaseTool):
         """
         try:
             if response.status_code != 200:
+                # Failed responses carry the service-side error in `result`
+                try:
+                    detail = response.json().get("result", "")
+                except (ValueError, AttributeError):
+                    detail = ""
+                if detail:
+                    return False, f"Service returned status code {response.status_code}: {detail}"
                 return False, f"Service returned status code {response.status_code}"
             
             data = response.json()
@@ -371,7 +384,7 @@ class XpertOCRTool(BaseTool):
         return (
             path.exists() and
             path.is_file() and
-            path.suffix.lower() in {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+            path.suffix.lower() in _LOCAL_IMAGE_SUFFIXES
         )
 
     def format_result(self, result: Dict[str, Any]) -> ToolResult:
@@ -3,10 +3,174 @@ API client module for XpertAgent.
 This module handles communication with the LLM API service.
 """
 
+import os
+import json
 import time
+import httpx
 import openai
-from typing import Optional
+import random
+import asyncio
+import inspect
+import threading
+from typing import Any, Callable, List, Optional, Tuple, Union
 from ..config.settings import settings
+from .xlogger import logger
+from .helpers import json_dumps, json_loads
+from .llm_cache import (
+    MemoryCache, get_llm_cache, get_semantic_cache, is_cacheable,
+    is_semantic_cacheable, make_cache_key, split_semantic_request
+)
+
+# Connection pool limits and timeouts shared by all API clients
+_HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=settings.API_MAX_KEEPALIVE_CONNECTIONS,
+    max_connections=settings.API_MAX_CONNECTIONS
+)
+_HTTP_TIMEOUT = httpx.Timeout(settings.API_TIMEOUT, connect=10.0)
+
+# Module-level HTTP client, so every APIClient reuses the same keep-alive connections.
+# Async clients are created per event loop instead (see APIClient.async_client),
+# since pooled async connections cannot outlive the loop that opened them.
+_http_client = httpx.Client(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
+
+# Errors worth retrying: rate limits, timeouts, connection failures and 5xx responses
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError
+)
+
+# Upper bound for a single backoff wait, in seconds
+MAX_BACKOFF_SECONDS = 30.0
+
+def backoff_delay(retries: int, error: Exception) -> float:
+    """
+    Compute how long to wait before the next retry.
+    
+    Args:
+        retries: Number of the upcoming retry (1-based)
+        error: Error raised by the failed attempt
+    
+    Returns:
+        float: Seconds to wait; the server's `Retry-After` when present,
+        otherwise exponential backoff with jitter
+    """
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after", ""))
+            return min(max(retry_after, 0.0), MAX_BACKOFF_SECONDS)
+        except ValueError:
+            pass
+    
+    # Equal jitter keeps a minimum wait but de-synchronizes concurrent clients
+    ceiling = min(MAX_BACKOFF_SECONDS, 2 ** retries)
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter usable from sync and async code.
+    
+    Attributes:
+        rate (float): Tokens added per second (<= 0 disables limiting)
+        capacity (int): Maximum burst size
+    """
+    
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """
+        Take one token, going into debt if none is available.
+        
+        Returns:
+            float: Seconds the caller must wait before using its token
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+    
+    def acquire(self):
+        """Block until a token is available."""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+    
+    async def acquire_async(self):
+        """Wait for a token without blocking the event loop."""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+# Rate limiter shared by all API clients, since provider limits are per account.
+# LLM_API_RPM defaults to the rate implied by LLM_API_MIN_REQUEST_INTERVAL.
+if settings.API_RPM > 0:
+    _rate_limiter = TokenBucket(settings.API_RPM / 60.0, settings.API_BURST)
+elif settings.API_MIN_REQUEST_INTERVAL > 0:
+    _rate_limiter = TokenBucket(1.0 / settings.API_MIN_REQUEST_INTERVAL, settings.API_BURST)
+else:
+    _rate_limiter = TokenBucket(0.0)
+
+def _load_checkpoint(path: str) -> dict:
+    """
+    Load finished responses from a JSONL batch checkpoint.
+    
+    Returns:
+        dict: Mapping of request key to serialized response
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json_loads(line)
+                done[record["key"]] = record["response"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # Skip a partially written line left by an interrupted run
+                continue
+    return done
+
+def _open_checkpoint(path: str):
+    """
+    Open a JSONL batch checkpoint for appending, terminating any partial last line.
+    """
+    needs_newline = False
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    f = open(path, "a", encoding="utf-8")
+    if needs_newline:
+        f.write("\n")
+    return f
+
+class _CacheLookup:
+    """
+    Cache state of a single chat completion request.
+    
+    Attributes:
+        key (str): Exact cache key, or None when the request is not cacheable
+        partition (str): Semantic cache partition, or None to bypass the semantic cache
+        user_text (str): Text embedded for the semantic lookup
+        embedding (list): Embedding of `user_text`, once computed
+    """
+    
+    def __init__(self):
+        self.key = None
+        self.partition = None
+        self.user_text = ""
+        self.embedding = None
 
 class APIClient:
     """
@@ -17,40 +181,268 @@ class APIClient:
     def __init__(self):
         """
         Initialize API client with configuration from settings.
-        Sets up OpenAI client and rate limiting parameters.
+        Sets up OpenAI clients and rate limiting parameters.
         """
-        # Initialize OpenAI client with API credentials
+        # Initialize OpenAI client with API credentials and the pooled HTTP client
+        # (SDK retries are disabled; retries are handled below with backoff)
         self.client = openai.OpenAI(
             api_key=settings.API_KEY,
-            base_url=settings.API_BASE
+            base_url=settings.API_BASE,
+            http_client=_http_client,
+            max_retries=0
         )
+        self._async_clients = {}  # Event loop -> AsyncOpenAI client
+        self._async_clients_lock = threading.Lock()
         
         # Set up rate limiting parameters
-        self.last_request_time = float(settings.API_LAST_REQUEST_TIME)
-        self.min_request_interval = float(settings.API_MIN_REQUEST_INTERVAL)
+        self.rate_limiter = _rate_limiter
         self.max_retries = int(settings.API_MAX_RETRIES)
+        
+        # Response caches for deterministic requests (None when disabled)
+        self.cache = get_llm_cache()
+        self.semantic_cache = get_semantic_cache()
+    
+    @property
+    def async_client(self) -> openai.AsyncOpenAI:
+        """
+        Get the async OpenAI client bound to the running event loop.
+        
+        Note:
+            - Each loop gets its own pooled connections, so a second
+              `asyncio.run(...)` does not reuse connections of a closed loop
+            - Clients of loops that have been closed are discarded
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                for stale_loop in [l for l in self._async_clients if l.is_closed()]:
+                    del self._async_clients[stale_loop]
+                client = self._async_clients[loop] = openai.AsyncOpenAI(
+                    api_key=settings.API_KEY,
+                    base_url=settings.API_BASE,
+                    http_client=httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT),
+                    max_retries=0
+                )
+        return client
+    
+    async def aclose(self):
+        """
+        Close the async client of the running event loop.
+        Call before the loop ends to release its pooled connections.
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            client = self._async_clients.pop(loop, None)
+        if client is not None:
+            await client.close()
     
-    def _wait_for_rate_limit(self):
+    def _canonicalize_messages(self, messages: list) -> list:
         """
-        Ensure request intervals comply with rate limits.
+        Mark the static prompt prefix for provider prompt caching.
         
         Note:
-            - Calculates time since last request
-            - Sleeps if minimum interval hasn't elapsed
-            - Updates last request timestamp
+            - Message order is never changed; the prefix is the leading run of
+              system messages
+            - With LLM_PROMPT_CACHE_CONTROL, the last message of that run is
+              marked as an ephemeral `cache_control` breakpoint (Anthropic-style)
+        """
+        if not settings.LLM_PROMPT_CACHE_CONTROL:
+            return messages
+        prefix_len = 0
+        while prefix_len < len(messages) and messages[prefix_len].get("role") == "system":
+            prefix_len += 1
+        if prefix_len == 0:
+            return messages
+        
+        last = messages[prefix_len - 1]
+        if not isinstance(last.get("content"), str):
+            return messages
+        messages = list(messages)
+        messages[prefix_len - 1] = {
+            **last,
+            "content": [{
+                "type": "text",
+                "text": last["content"],
+                "cache_control": {"type": "ephemeral"}
+            }]
+        }
+        return messages
+    
+    def _cache_begin(
+        self, 
+        messages: list,
+        kwargs: dict
+    ) -> Tuple[Optional[openai.types.chat.ChatCompletion], "_CacheLookup"]:
+        """
+        Look up a cached response for a deterministic request.
+        
+        Returns:
+            Tuple: (cached_response, lookup); when there is no exact hit, the
+            lookup tells whether the semantic cache should be tried
+        """
+        lookup = _CacheLookup()
+        if self.cache is not None and is_cacheable(**kwargs):
+            lookup.key = make_cache_key(settings.DEFAULT_MODEL, messages, **kwargs)
+            try:
+                cached = self.cache.get(lookup.key)
+            except Exception as e:
+                logger.warning(f"Response cache lookup error: {str(e)}")
+                cached = None
+            if cached is not None:
+                return cached, lookup
+        
+        if self.semantic_cache is not None and is_semantic_cacheable(**kwargs):
+            partition, user_text = split_semantic_request(settings.DEFAULT_MODEL, messages, **kwargs)
+            if user_text:
+                lookup.partition, lookup.user_text = partition, user_text
+        return None, lookup
+    
+    def _semantic_get(
+        self, 
+        lookup: "_CacheLookup",
+        embedding: Optional[list]
+    ) -> Optional[openai.types.chat.ChatCompletion]:
+        """
+        Look up a near-duplicate response once the query embedding is known.
+        Bypasses the semantic cache for this request if embedding failed.
+        """
+        if embedding is None:
+            lookup.partition = None
+            return None
+        lookup.embedding = embedding
+        try:
+            return self.semantic_cache.get(lookup.partition, embedding)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup error: {str(e)}")
+            lookup.partition = None
+            return None
+    
+    def _cache_store(self, lookup: "_CacheLookup", response: openai.types.chat.ChatCompletion):
+        """Store a fresh response in the caches the request was looked up in."""
+        if lookup.key is not None:
+            try:
+                self.cache.set(lookup.key, response)
+            except Exception as e:
+                logger.warning(f"Response cache store error: {str(e)}")
+        if lookup.partition is not None:
+            self.semantic_cache.set(lookup.partition, lookup.embedding, response)
+    
+    async def _acache_call(self, func: Callable, *args) -> Any:
+        """
+        Run a cache helper from async code.
+        
+        Note:
+            Remote backends (e.g. Redis) do blocking network I/O, so they are
+            run in a worker thread instead of stalling the event loop
+        """
+        if self.cache is None or isinstance(self.cache, MemoryCache):
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+    
+    def _embed(self, text: str) -> Optional[list]:
+        """Embed text for the semantic cache; returns None on failure."""
+        try:
+            return self.client.embeddings.create(
+                model=settings.LLM_SEMANTIC_CACHE_EMBEDDING_MODEL,
+                input=text
+            ).data[0].embedding
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup error: {str(e)}")
+            return None
+    
+    async def _aembed(self, text: str) -> Optional[list]:
+        """Async variant of `_embed`."""
+        try:
+            return (await self.async_client.embeddings.create(
+                model=settings.LLM_SEMANTIC_CACHE_EMBEDDING_MODEL,
+                input=text
+            )).data[0].embedding
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup error: {str(e)}")
+            return None
+    
+    def _retry_delay(self, retries: int, error: Exception) -> float:
+        """
+        Apply the retry policy to a retryable error.
+        
+        Args:
+            retries: Number of the upcoming retry (1-based)
+            error: Error raised by the failed attempt
+        
+        Returns:
+            float: Seconds to wait before retrying
+        
+        Raises:
+            Exception: If all retries have been used
+        """
+        if retries > self.max_retries:
+            raise Exception(
+                f"Maximum retry attempts ({self.max_retries}) reached"
+            ) from error
+        
+        # Calculate wait time (Retry-After or jittered exponential backoff)
+        wait_time = backoff_delay(retries, error)
+        logger.warning(
+            f"{error.__class__.__name__}, waiting {wait_time:.1f}s "
+            f"(attempt {retries}/{self.max_retries})"
+        )
+        return wait_time
+    
+    def _call_with_retries(self, call: Callable[[], Any]) -> Any:
         """
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
+        Run an API call under rate limiting, retrying retryable errors.
         
-        if time_since_last_request < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last_request
-            time.sleep(sleep_time)
+        Args:
+            call: Function making one API request
         
-        self.last_request_time = time.time()
+        Returns:
+            Result of `call`
+        """
+        retries = 0
+        while True:
+            try:
+                self.rate_limiter.acquire()
+                return call()
+            except RETRYABLE_ERRORS as e:
+                retries += 1
+                time.sleep(self._retry_delay(retries, e))
+            except Exception as e:
+                logger.error(f"API call error: {str(e)}")
+                raise
+    
+    async def _acall_with_retries(
+        self, 
+        call: Callable[[], Any],
+        can_retry: Optional[Callable[[], bool]] = None
+    ) -> Any:
+        """
+        Async variant of `_call_with_retries`.
+        
+        Args:
+            call: Coroutine function making one API request
+            can_retry: Optional check whether a failed attempt may be retried
+        
+        Returns:
+            Result of `call`
+        """
+        retries = 0
+        while True:
+            try:
+                await self.rate_limiter.acquire_async()
+                return await call()
+            except RETRYABLE_ERRORS as e:
+                if can_retry is not None and not can_retry():
+                    raise
+                retries += 1
+                await asyncio.sleep(self._retry_delay(retries, e))
+            except Exception as e:
+                logger.error(f"API call error: {str(e)}")
+                raise
     
     def create_chat_completion(
         self, 
-        messages: list, 
+        messages: list,
         **kwargs
     ) -> Optional[openai.types.chat.ChatCompletion]:
         """
@@ -59,48 +451,175 @@ class APIClient:
         Args:
             messages: List of message dictionaries for the conversation
             **kwargs: Additional parameters for the API call
-            
+        
         Returns:
             ChatCompletion: API response object
-            
+        
         Raises:
-            RateLimitError: If rate limit is exceeded after all retries
+            Exception: If retryable errors persist after all retries
             Exception: For other API errors
-            
+        
         Note:
-            - Implements exponential backoff for retries
+            - Retries rate limits, timeouts, connection errors and 5xx with
+              jittered exponential backoff, honoring Retry-After
             - Handles rate limiting automatically
             - Adapts to different API response formats
+            - Serves temperature=0 requests from the response cache when enabled
+            - Marks the leading system prompt as a prompt-cache breakpoint when enabled
         """
-        retries = 0
-        while retries <= self.max_retries:
-            try:
-                # Wait for rate limit
-                self._wait_for_rate_limit()
-                
-                # Make API request
-                response = self.client.chat.completions.create(
-                    model=settings.DEFAULT_MODEL,
-                    messages=messages,
-                    **kwargs
-                )
-                return response
-                
-            except openai.RateLimitError as e:
-                retries += 1
-                if retries > self.max_retries:
-                    raise Exception(
-                        f"Maximum retry attempts ({self.max_retries}) reached"
-                    )
-                
-                # Calculate wait time with exponential backoff
-                wait_time = 2 ** retries
-                print(
-                    f"Rate limit reached, waiting {wait_time}s "
-                    f"(attempt {retries}/{self.max_retries})"
-                )
-                time.sleep(wait_time)
-                
-            except Exception as e:
-                print(f"API call error: {str(e)}")
-                raise
\ No newline at end of file
+        # Mark the static prefix, then serve deterministic requests from cache
+        messages = self._canonicalize_messages(messages)
+        cached, lookup = self._cache_begin(messages, kwargs)
+        if cached is None and lookup.partition is not None:
+            cached = self._semantic_get(lookup, self._embed(lookup.user_text))
+        if cached is not None:
+            return cached
+        
+        response = self._call_with_retries(lambda: self.client.chat.completions.create(
+            model=settings.DEFAULT_MODEL,
+            messages=messages,
+            **kwargs
+        ))
+        self._cache_store(lookup, response)
+        return response
+    
+    async def acreate_chat_completion(
+        self, 
+        messages: list,
+        **kwargs
+    ) -> Optional[openai.types.chat.ChatCompletion]:
+        """
+        Async variant of `create_chat_completion`.
+        
+        Args:
+            messages: List of message dictionaries for the conversation
+            **kwargs: Additional parameters for the API call
+        
+        Returns:
+            ChatCompletion: API response object
+        
+        Raises:
+            Exception: If retryable errors persist after all retries
+            Exception: For other API errors
+        
+        Note:
+            - Shares pooled keep-alive connections across concurrent calls on
+              the same event loop
+            - Waits for rate limits and backoff without blocking the event loop
+        """
+        # Mark the static prefix, then serve deterministic requests from cache
+        messages = self._canonicalize_messages(messages)
+        cached, lookup = await self._acache_call(self._cache_begin, messages, kwargs)
+        if cached is None and lookup.partition is not None:
+            cached = self._semantic_get(lookup, await self._aembed(lookup.user_text))
+        if cached is not None:
+            return cached
+        
+        response = await self._acall_with_retries(lambda: self.async_client.chat.completions.create(
+            model=settings.DEFAULT_MODEL,
+            messages=messages,
+            **kwargs
+        ))
+        await self._acache_call(self._cache_store, lookup, response)
+        return response
+    
+    async def acreate_chat_completion_stream(
+        self, 
+        messages: list,
+        on_delta: Callable[[str], Any],
+        **kwargs
+    ) -> str:
+        """
+        Stream a chat completion, forwarding content deltas as they arrive.
+        
+        Args:
+            messages: List of message dictionaries for the conversation
+            on_delta: Callback (sync or async) invoked with each content delta
+            **kwargs: Additional parameters for the API call
+        
+        Returns:
+            str: Full response content
+        
+        Raises:
+            Exception: If retryable errors persist after all retries
+            Exception: For other API errors
+        
+        Note:
+            - Callers can act on the first tokens instead of waiting for the last
+            - Retries only happen before the first delta is delivered
+            - Response caches are bypassed
+        """
+        messages = self._canonicalize_messages(messages)
+        parts = []
+        
+        async def _stream() -> str:
+            stream = await self.async_client.chat.completions.create(
+                model=settings.DEFAULT_MODEL,
+                messages=messages,
+                stream=True,
+                **kwargs
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    result = on_delta(delta)
+                    if inspect.isawaitable(result):
+                        await result
+            return "".join(parts)
+        
+        # Deltas already delivered cannot be taken back, so only retry before the first
+        return await self._acall_with_retries(_stream, can_retry=lambda: not parts)
+    
+    async def create_chat_completions_batch(
+        self, 
+        messages_list: List[list],
+        concurrency: int = 8,
+        output_jsonl: Optional[str] = None,
+        **kwargs
+    ) -> List[Union[openai.types.chat.ChatCompletion, Exception]]:
+        """
+        Create chat completions for a batch of conversations concurrently.
+        
+        Args:
+            messages_list: List of message lists, one per conversation
+            concurrency: Maximum number of requests in flight at once
+            output_jsonl: Optional checkpoint file; each finished response is
+                appended as it completes and reused when the batch is re-run
+            **kwargs: Additional parameters for each API call
+        
+        Returns:
+            List: Responses in input order; failed calls yield their exception
+        
+        Note:
+            - Concurrency is bounded by a semaphore
+            - Request pacing is still enforced by the shared token bucket
+            - Checkpoint records are keyed by the request hash, so a restarted
+              job only sends requests that have not finished yet
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        keys = [make_cache_key(settings.DEFAULT_MODEL, messages, **kwargs) for messages in messages_list]
+        done = _load_checkpoint(output_jsonl) if output_jsonl else {}
+        checkpoint = _open_checkpoint(output_jsonl) if output_jsonl else None
+        
+        async def _one(key: str, messages: list):
+            if key in done:
+                return openai.types.chat.ChatCompletion.model_validate(done[key])
+            async with semaphore:
+                response = await self.acreate_chat_completion(messages=messages, **kwargs)
+            if checkpoint is not None:
+                # Single-threaded event loop: write + flush cannot interleave
+                checkpoint.write(json_dumps({"key": key, "response": response.model_dump()}) + "\n")
+                checkpoint.flush()
+            return response
+        
+        try:
+            return await asyncio.gather(
+                *(_one(key, messages) for key, messages in zip(keys, messages_list)),
+                return_exceptions=True
+            )
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
@@ -8,9 +8,35 @@ import json
 from typing import Any, Dict
 from xpertagent.utils.xlogger import logger
 
+try:
+    import orjson
+
+    def json_loads(data: Any) -> Any:
+        """Parse JSON with orjson."""
+        return orjson.loads(data)
+
+    def json_dumps(obj: Any, sort_keys: bool = False) -> str:
+        """Serialize to a JSON string with orjson; unknown types fall back to `str`."""
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=str, option=option).decode("utf-8")
+except ImportError:
+    def json_loads(data: Any) -> Any:
+        """Parse JSON with the standard library."""
+        return json.loads(data)
+
+    def json_dumps(obj: Any, sort_keys: bool = False) -> str:
+        """Serialize to a JSON string; unknown types fall back to `str`."""
+        return json.dumps(obj, sort_keys=sort_keys, ensure_ascii=False, default=str)
+
 RESPONSE_STATUS_SUCCESS = "0"
 RESPONSE_STATUS_FAILED = "1"
 
+# String values accepted as True by `safe_parse_bool`
+_TRUTHY_VALUES = frozenset({'true', '1', 'yes', 'on', 't'})
+
+# Matches `"thought"`, `"action"` and `"action_input"` string fields in malformed JSON
+_JSON_FIELD_RE = re.compile(r'"(?P<key>thought|action|action_input)"\s*:\s*"(?P<value>[^"]*)"')
+
 def http_response(success: bool, result: Any, msg: str) -> Dict[str, Any]:
     """Format tool execution result into standard response format."""
     return {
@@ -37,20 +63,20 @@ def safe_json_loads(text: str) -> Dict[str, Any]:
     """
     try:
         # First attempt: direct JSON parsing
-        return json.loads(text)
+        return json_loads(text)
     except json.JSONDecodeError:
         logger.warning(f"Direct JSON parsing failed, attempting cleanup and extraction: {text}")
         try:
             # Second attempt: extract JSON-formatted content
-            # Use regex to match thought, action, and action_input
-            thought_match = re.search(r'"thought"\s*:\s*"([^"]*)"', text)
-            action_match = re.search(r'"action"\s*:\s*"([^"]*)"', text)
-            action_input_match = re.search(r'"action_input"\s*:\s*"([^"]*)"', text)
+            # Match thought, action, and action_input in one pass (first occurrence wins)
+            fields = {}
+            for match in _JSON_FIELD_RE.finditer(text):
+                fields.setdefault(match.group("key"), match.group("value"))
             
             result = {
-                "thought": thought_match.group(1) if thought_match else "",
-                "action": action_match.group(1) if action_match else "respond",
-                "action_input": action_input_match.group(1) if action_input_match else text
+                "thought": fields.get("thought", ""),
+                "action": fields.get("action", "respond"),
+                "action_input": fields.get("action_input", text)
             }
             
             logger.info(f"Successfully extracted JSON content: {result}")
@@ -85,36 +111,25 @@ def extract_json_from_string(text: str) -> str:
         '{"items": [{"id": 1}, {"id": 2}]}'
     """
     try:
-        # Find potential JSON by matching balanced braces
-        stack = []
-        start = -1
-        candidates = []
-        
-        for i, char in enumerate(text):
-            if char == '{':
-                if not stack:  # First opening brace
-                    start = i
-                stack.append(char)
-            elif char == '}':
-                if stack:
-                    stack.pop()
-                    if not stack:  # All braces are matched
-                        candidates.append(text[start:i+1])
-        
-        # Try each candidate, starting with the longest ones first
-        # This ensures we get the most complete JSON object
-        for candidate in sorted(candidates, key=len, reverse=True):
+        # Decode at each opening brace with the C-accelerated raw_decode, skipping
+        # past every decoded object and keeping the longest (most complete) one
+        decoder = json.JSONDecoder()
+        best = ""
+        start = text.find('{')
+        while start != -1:
             try:
-                # Verify it's valid JSON by parsing it
-                json.loads(candidate)
-                return candidate
+                _, end = decoder.raw_decode(text, start)
             except json.JSONDecodeError:
+                start = text.find('{', start + 1)
                 continue
-                
-        return ""
+            if end - start > len(best):
+                best = text[start:end]
+            start = text.find('{', end)
+        
+        return best
         
     except Exception as e:
-        print(f"Error extracting JSON: {str(e)}")
+        logger.error(f"Error extracting JSON: {str(e)}")
         return ""
 
 def format_tool_response(success: bool, result: Any) -> Dict[str, Any]:
@@ -139,8 +154,15 @@ def safe_parse_bool(value: str) -> bool:
     Returns:
         bool: Parsed boolean value
     """
-    return str(value).lower() in ('true', '1', 'yes', 'on', 't')
+    return str(value).lower() in _TRUTHY_VALUES
 
 def format_prompt(prompt_template: str, **kwargs) -> str:
-    """Format prompt template with provided values."""
+    """
+    Format prompt template with provided values.
+
+    Note:
+        Keep static instructions, tool schemas and examples at the start of the
+        template and place `{placeholders}` only in the trailing part, so
+        providers can reuse the cached prompt prefix across calls.
+    """
     return prompt_template.format(**kwargs)
\ No newline at end of file
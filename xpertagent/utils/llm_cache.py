@@ -0,0 +1,257 @@
+"""
+LLM response cache module for XpertAgent.
+This module caches deterministic chat completions so identical requests
+do not hit the LLM API again.
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Protocol
+from openai.types.chat import ChatCompletion
+from ..config.settings import settings
+from .helpers import json_dumps
+
+def make_cache_key(model: str, messages: list, **params) -> str:
+    """
+    Build a stable cache key for a chat completion request.
+
+    Args:
+        model: Model name
+        messages: List of message dictionaries for the conversation
+        **params: Remaining request parameters (temperature, tools, ...)
+
+    Returns:
+        str: SHA-256 hex digest of the canonical request
+    """
+    payload = json_dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def is_cacheable(**params) -> bool:
+    """
+    Check whether a request is deterministic enough to be cached.
+
+    Note:
+        - Only `temperature=0` requests are cached
+        - Streaming and multi-choice requests are never cached
+    """
+    return (
+        params.get("temperature") == 0
+        and not params.get("stream")
+        and params.get("n", 1) == 1
+    )
+
+def is_semantic_cacheable(**params) -> bool:
+    """
+    Check whether a request may be answered from the semantic cache.
+
+    Note:
+        Tool/function-calling requests are excluded, since near-duplicate
+        prompts may still need different tool calls
+    """
+    return (
+        is_cacheable(**params)
+        and not params.get("tools")
+        and not params.get("functions")
+    )
+
+class CacheBackend(Protocol):
+    """Interface shared by all LLM cache backends."""
+
+    hits: int
+    misses: int
+
+    def get(self, key: str) -> Optional[ChatCompletion]:
+        ...
+
+    def set(self, key: str, value: ChatCompletion, ttl: Optional[float] = None) -> None:
+        ...
+
+class MemoryCache:
+    """
+    In-process LRU cache with per-entry TTL.
+
+    Attributes:
+        max_size (int): Maximum number of cached responses
+        ttl (float): Default time-to-live in seconds
+        hits (int): Number of cache hits
+        misses (int): Number of cache misses
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[ChatCompletion]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: str, value: ChatCompletion, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+class RedisCache:
+    """
+    Redis-backed cache shared across processes.
+
+    Note:
+        Requires the optional `redis` package
+    """
+
+    def __init__(self, url: str, ttl: float = 3600.0, prefix: str = "xpertagent:llm:"):
+        import redis
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[ChatCompletion]:
+        raw = self._redis.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ChatCompletion.model_validate_json(raw)
+
+    def set(self, key: str, value: ChatCompletion, ttl: Optional[float] = None) -> None:
+        self._redis.set(
+            self.prefix + key,
+            value.model_dump_json(),
+            ex=max(1, int(self.ttl if ttl is None else ttl))
+        )
+
+def split_semantic_request(model: str, messages: list, **params):
+    """
+    Split a request into its semantic-cache partition key and query text.
+
+    Args:
+        model: Model name
+        messages: List of message dictionaries for the conversation
+        **params: Remaining request parameters
+
+    Returns:
+        Tuple[str, str]: (partition_key, user_text). Requests only match within
+        the same partition, i.e. identical model, system/assistant context and parameters
+    """
+    context = [m for m in messages if m.get("role") != "user"]
+    user_text = "\n".join(
+        str(m.get("content", "")) for m in messages if m.get("role") == "user"
+    )
+    return make_cache_key(model, context, **params), user_text
+
+class SemanticCache:
+    """
+    Near-duplicate response cache over L2-normalized prompt embeddings.
+
+    Attributes:
+        threshold (float): Minimum cosine similarity for a hit
+        max_size (int): Maximum entries per partition; new entries are skipped when full
+        hits (int): Number of cache hits
+        misses (int): Number of cache misses
+
+    Note:
+        Requires the optional `faiss` package
+    """
+
+    def __init__(self, threshold: float = 0.92, max_size: int = 10000):
+        import faiss
+        import numpy as np
+
+        self._faiss = faiss
+        self._np = np
+        self.threshold = threshold
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._partitions = {}
+        self._lock = threading.Lock()
+
+    def _normalize(self, embedding):
+        vec = self._np.asarray(embedding, dtype="float32").reshape(1, -1)
+        self._faiss.normalize_L2(vec)
+        return vec
+
+    def get(self, partition: str, embedding) -> Optional[ChatCompletion]:
+        vec = self._normalize(embedding)
+        with self._lock:
+            entry = self._partitions.get(partition)
+            if entry is not None and entry[0].ntotal:
+                scores, ids = entry[0].search(vec, 1)
+                if scores[0][0] >= self.threshold:
+                    self.hits += 1
+                    return entry[1][ids[0][0]]
+            self.misses += 1
+            return None
+
+    def set(self, partition: str, embedding, value: ChatCompletion) -> None:
+        vec = self._normalize(embedding)
+        with self._lock:
+            entry = self._partitions.get(partition)
+            if entry is None:
+                entry = self._partitions[partition] = (self._faiss.IndexFlatIP(vec.shape[1]), [])
+            if entry[0].ntotal >= self.max_size:
+                return
+            entry[0].add(vec)
+            entry[1].append(value)
+
+# Process-wide cache instance shared by all API clients
+_llm_cache: Optional[CacheBackend] = None
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache() -> Optional[CacheBackend]:
+    """
+    Get the process-wide cache backend configured in settings.
+
+    Returns:
+        CacheBackend: Redis cache if a URL is configured, memory cache otherwise,
+        or None when caching is disabled
+    """
+    global _llm_cache
+    if not settings.LLM_CACHE_ENABLE:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            if settings.LLM_CACHE_REDIS_URL:
+                _llm_cache = RedisCache(settings.LLM_CACHE_REDIS_URL, ttl=settings.LLM_CACHE_TTL)
+            else:
+                _llm_cache = MemoryCache(max_size=settings.LLM_CACHE_MAX_SIZE, ttl=settings.LLM_CACHE_TTL)
+        return _llm_cache
+
+_semantic_cache: Optional[SemanticCache] = None
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """
+    Get the process-wide semantic cache, or None when it is disabled.
+    """
+    global _semantic_cache
+    if not settings.LLM_SEMANTIC_CACHE_ENABLE:
+        return None
+    with _llm_cache_lock:
+        if _semantic_cache is None:
+            _semantic_cache = SemanticCache(
+                threshold=settings.LLM_SEMANTIC_CACHE_THRESHOLD,
+                max_size=settings.LLM_SEMANTIC_CACHE_MAX_SIZE
+            )
+        return _semantic_cache
@@ -18,15 +18,27 @@ Key Features:
 import sys
 import os
 import json
-import requests
+import time
+import httpx
+import asyncio
 import dingtalk_stream
 
+from typing import Optional
 from dingtalk_stream import CallbackHandler
-from concurrent.futures import ThreadPoolExecutor
 from xpertagent.utils.xlogger import logger
 from xpertagent.config.settings import settings
 from xpertagent.services.xservice import XService
 
+# DingTalk open API base URL
+DINGTALK_API_BASE = "https://oapi.dingtalk.com"
+
+# Prefixes of messages treated as image URLs
+URL_PREFIXES = ("http://", "https://")
+
+# How long (seconds) and how many recent XOCR replies are kept for repeated messages
+RECENT_REPLY_TTL = 300
+RECENT_REPLY_MAX = 1024
+
 class DingTalkBotHandler(CallbackHandler):
     """
     DingTalk Bot Message Handler
@@ -38,6 +50,9 @@ class DingTalkBotHandler(CallbackHandler):
         app_key (str): DingTalk application key from settings
         app_secret (str): DingTalk application secret from settings
         webhook_token (str): DingTalk webhook token for custom bot
+        _http (httpx.AsyncClient): Pooled HTTP client reused across messages in one event loop
+        recent_replies (dict): Short-lived (expiry, reply) entries keyed by sender and
+            message, so repeated image URLs are not OCR'd again
     """
 
     def __init__(self):
@@ -47,41 +62,74 @@ class DingTalkBotHandler(CallbackHandler):
         self.app_secret = settings.XDINGTALK_APP_SECRET
         self.webhook_token = settings.XDINGTALK_WEBHOOK_TOKEN
         
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop = None
+        self._http_closer: Optional[asyncio.Task] = None
+        self.recent_replies = {}
+        
         if not self.webhook_token:
             logger.warning("XDINGTALK_WEBHOOK_TOKEN not set")
     
-    async def get_access_token(self) -> str:
+    def _get_http_client(self) -> httpx.AsyncClient:
         """
-        Retrieve access token from DingTalk API.
+        Get the pooled HTTP client for the running event loop.
 
         Returns:
-            str: The access token for DingTalk API authentication
+            httpx.AsyncClient: Keep-alive client for DingTalk API calls
 
-        Raises:
-            ValueError: If APP_KEY or APP_SECRET is missing
-            Exception: If token retrieval fails
+        Note:
+            The stream client starts a new event loop on every reconnect and httpx
+            connections are bound to the loop that opened them, so the client is
+            recreated whenever the running loop changes. Each client is closed
+            inside its own loop, when that loop shuts down
+        """
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http_loop is not loop:
+            if self._http_closer is not None and not self._http_loop.is_closed():
+                # Previous loop is still alive: close its client there
+                self._http_loop.call_soon_threadsafe(self._http_closer.cancel)
+            self._http = httpx.AsyncClient(
+                base_url=DINGTALK_API_BASE,
+                timeout=10.0,
+                limits=httpx.Limits(max_keepalive_connections=20)
+            )
+            self._http_loop = loop
+            self._http_closer = loop.create_task(self._close_on_loop_shutdown(self._http))
+        return self._http
+    
+    async def _close_on_loop_shutdown(self, client: httpx.AsyncClient):
+        """
+        Wait until cancelled, then close the HTTP client.
+
+        Note:
+            asyncio.run() cancels pending tasks before it closes the loop, so the
+            client is closed while its connections' loop is still running
         """
-        if not all([self.app_key, self.app_secret]):
-            raise ValueError("Missing APP_KEY or APP_SECRET")
-            
-        url = "https://oapi.dingtalk.com/gettoken"
-        params = {
-            "appkey": self.app_key,
-            "appsecret": self.app_secret
-        }
-        
         try:
-            response = requests.get(url, params=params)
-            result = response.json()
-            if result.get("errcode") == 0:
-                self.access_token = result.get("access_token")
-                logger.info(f"Successfully obtained access_token: `{self.access_token}`")
-                return self.access_token
-            else:
-                raise Exception(f"Failed to get access_token: {result}")
-        except Exception as e:
-            logger.error(f"Failed to get access_token: {e}")
-            raise
+            await asyncio.get_running_loop().create_future()
+        finally:
+            await client.aclose()
+            if self._http is client:
+                self._http = None
+                self._http_loop = None
+                self._http_closer = None
+    
+    def _get_recent_reply(self, key: str) -> Optional[str]:
+        """Get a reply stored by `_remember_reply`, unless it has expired."""
+        entry = self.recent_replies.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self.recent_replies[key]
+            return None
+        return entry[1]
+    
+    def _remember_reply(self, key: str, reply: str):
+        """Store a reply for RECENT_REPLY_TTL seconds, evicting the oldest entry when full."""
+        self.recent_replies.pop(key, None)
+        if len(self.recent_replies) >= RECENT_REPLY_MAX:
+            del self.recent_replies[next(iter(self.recent_replies))]
+        self.recent_replies[key] = (time.monotonic() + RECENT_REPLY_TTL, reply)
     
     async def send_message(self, conversation_id: str, content: str) -> bool:
         """
@@ -99,7 +147,6 @@ class DingTalkBotHandler(CallbackHandler):
                 logger.error("Missing XDINGTALK_WEBHOOK_TOKEN")
                 return False
                 
-            url = f"https://oapi.dingtalk.com/robot/send"
             params = {
                 "access_token": self.webhook_token
             }
@@ -115,7 +162,7 @@ class DingTalkBotHandler(CallbackHandler):
             }
             
             logger.info(f"Message parameters: {data}")
-            response = requests.post(url, params=params, json=data)
+            response = await self._get_http_client().post("/robot/send", params=params, json=data)
             result = response.json()
             
             if result.get('errcode') == 0:
@@ -145,7 +192,6 @@ class DingTalkBotHandler(CallbackHandler):
                 logger.error("Missing XDINGTALK_WEBHOOK_TOKEN")
                 return False
                 
-            url = f"https://oapi.dingtalk.com/robot/send"
             params = {
                 "access_token": self.webhook_token
             }
@@ -161,7 +207,7 @@ class DingTalkBotHandler(CallbackHandler):
             }
             
             logger.info(f"Group message parameters: {data}")
-            response = requests.post(url, params=params, json=data)
+            response = await self._get_http_client().post("/robot/send", params=params, json=data)
             result = response.json()
             
             if result.get('errcode') == 0:
@@ -200,7 +246,7 @@ class DingTalkBotHandler(CallbackHandler):
             }
             
             logger.info(f"Individual message parameters: {data}")
-            response = requests.post(session_webhook, json=data)
+            response = await self._get_http_client().post(session_webhook, json=data)
             result = response.json()
             
             if result.get('errcode') == 0:
@@ -251,14 +297,22 @@ class DingTalkBotHandler(CallbackHandler):
                 
                 ### ==================================================================
                 ### 临时测试：用 XOCR！！！
-                if text_content.startswith("http://") or text_content.startswith("https://"):
-                    http_response = await self.xservice.make_http_request(
-                        "/xocr/process",
-                        json={
-                            "img_url": text_content
-                        }
-                    )
-                    response = http_response["result"]
+                if text_content.startswith(URL_PREFIXES):
+                    # Reuse the OCR result when the same sender repeats a URL within the TTL
+                    reply_key = f"{sender_id}\n{text_content}"
+                    response = self._get_recent_reply(reply_key)
+                    if response is None:
+                        http_response = await self.xservice.make_http_request(
+                            "/xocr/process",
+                            json={
+                                "img_url": text_content
+                            }
+                        )
+                        response = http_response["result"]
+                        if http_response.get("success"):
+                            self._remember_reply(reply_key, response)
+                    else:
+                        logger.info("Reusing recent XOCR reply")
                 else:
                     response = f"Message received from {sender_nick}: `{text_content}`. \n\nIf you want to use the XOCR service, please send an image URL."
                 ### ==================================================================
@@ -307,14 +361,13 @@ def start_bot(app_key: str, app_secret: str):
 def run():
     """
     Main entry point for running the DingTalk bot.
-    Validates required settings and starts the bot in a separate thread.
+    Validates required settings and runs the bot's event loop in the current thread.
     """
     if not all([settings.XDINGTALK_APP_KEY, settings.XDINGTALK_APP_SECRET]):
         logger.error("Please configure XDINGTALK_APP_KEY and XDINGTALK_APP_SECRET in .env file")
         return
     
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        executor.submit(start_bot, settings.XDINGTALK_APP_KEY, settings.XDINGTALK_APP_SECRET)
+    start_bot(settings.XDINGTALK_APP_KEY, settings.XDINGTALK_APP_SECRET)
 
 if __name__ == "__main__":
     run()
\ No newline at end of file
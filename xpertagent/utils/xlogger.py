@@ -13,17 +13,49 @@ This module provides a comprehensive logging solution with the following feature
 
 import os
 import json
+import sys
+import atexit
 import logging
-import inspect
 import time
 
-from queue import Queue, Empty
-from pymongo import MongoClient
-from datetime import datetime
-from threading import Thread, Lock
-from logging.handlers import TimedRotatingFileHandler
+from queue import Empty, SimpleQueue
+import bson
+from bson.errors import InvalidDocument
+from bson.raw_bson import RawBSONDocument
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING, TEXT
+from pymongo.errors import PyMongoError
+from threading import Thread, Lock, Event
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 from xpertagent.config.settings import settings
 
+try:
+    import orjson
+
+    def _dumps_log(log_data):
+        """Serialize a log record to a compact JSON line with orjson."""
+        return orjson.dumps(log_data, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+except ImportError:
+    def _dumps_log(log_data):
+        """Serialize a log record to a compact JSON line."""
+        return json.dumps(log_data, ensure_ascii=False, separators=(',', ':'))
+
+def _encode_bson(log_data):
+    """
+    Encode a log record to BSON once, so insert_many sends it without re-encoding.
+    
+    Args:
+        log_data (dict): Log record
+        
+    Returns:
+        RawBSONDocument: Encoded log record
+    """
+    try:
+        return RawBSONDocument(bson.encode(log_data))
+    except (InvalidDocument, OverflowError):
+        # BSON is stricter than the JSON log line (e.g. non-string keys);
+        # store the JSON-normalized form instead
+        return RawBSONDocument(bson.encode(json.loads(_dumps_log(log_data))))
+
 class Colors:
     """ANSI color codes for console output"""
     RESET = "\033[0m"
@@ -45,10 +77,34 @@ class ColoredFormatter(logging.Formatter):
         'CRITICAL': Colors.MAGENTA
     }
 
+    def __init__(self, fmt=None, datefmt=None, style='%', use_color=None):
+        """
+        Initialize the formatter.
+        
+        Args:
+            fmt (str): Log message format
+            datefmt (str): Date format
+            style (str): Format style
+            use_color (bool): Colorize output; defaults to whether stderr is a TTY
+        """
+        super().__init__(fmt, datefmt, style)
+        if use_color is None:
+            use_color = sys.stderr.isatty()
+        self.use_color = use_color
+        # Color prefix/suffix per numeric level, built once instead of per record
+        self._wrap = {
+            logging.getLevelName(name): (color, Colors.RESET)
+            for name, color in self.COLORS.items()
+        }
+        self._default_wrap = (Colors.WHITE, Colors.RESET)
+
     def format(self, record):
         """Format log record with appropriate color"""
         log_message = super().format(record)
-        return f"{self.COLORS.get(record.levelname, Colors.WHITE)}{log_message}{Colors.RESET}"
+        if not self.use_color:
+            return log_message
+        prefix, suffix = self._wrap.get(record.levelno, self._default_wrap)
+        return prefix + log_message + suffix
 
 class CustomTimedRotatingFileHandler(TimedRotatingFileHandler):
     """
@@ -76,6 +132,30 @@ class CustomTimedRotatingFileHandler(TimedRotatingFileHandler):
         super().__init__(os.path.join(log_dir, log_filename), 
                         when=when, interval=interval, 
                         backupCount=backupCount, encoding=encoding)
+        # Rollover only applies to regular files; checked once here and on rollover
+        # instead of stat-ing the log path for every record
+        self._is_regular = self._check_regular_file()
+
+    def _check_regular_file(self):
+        """
+        Check whether the log path is (or will be created as) a regular file.
+        
+        Returns:
+            bool: False for special files such as /dev/null or pipes
+        """
+        return not os.path.exists(self.baseFilename) or os.path.isfile(self.baseFilename)
+
+    def shouldRollover(self, record):
+        """
+        Determine if rollover should occur, using the cached file type check.
+        
+        Args:
+            record: Log record being emitted
+            
+        Returns:
+            bool: True if the record is past the next rollover time
+        """
+        return self._is_regular and record.created >= self.rolloverAt
 
     def doRollover(self):
         """
@@ -103,6 +183,7 @@ class CustomTimedRotatingFileHandler(TimedRotatingFileHandler):
         # Open new log file
         if not self.delay:
             self.stream = self._open()
+        self._is_regular = self._check_regular_file()
 
         # Calculate next rollover time
         currentTime = int(time.time())
@@ -122,7 +203,8 @@ class CustomTimedRotatingFileHandler(TimedRotatingFileHandler):
         try:
             if self.shouldRollover(record):
                 self.doRollover()
-            TimedRotatingFileHandler.emit(self, record)
+            # Write directly; the base emit would repeat the rollover check
+            logging.FileHandler.emit(self, record)
         except Exception:
             self.handleError(record)
 
@@ -130,15 +212,57 @@ class LogMongoDBClient:
     """
     MongoDB client specifically for log management.
     Provides methods for log insertion and querying with various filters.
+    
+    Attributes:
+        _client_by_pid (dict): One pooled MongoClient per process, shared by all instances
+        _indexed_collections (set): Collections whose indexes were already ensured
     """
+    _client_by_pid = {}
+    _indexed_collections = set()
+    _client_lock = Lock()
+
+    # Indexes backing the find_logs_by_* queries
+    INDEXES = [
+        IndexModel([('time', DESCENDING)]),
+        IndexModel([('level', ASCENDING), ('time', DESCENDING)]),
+        IndexModel([('category', ASCENDING), ('time', DESCENDING)]),
+        IndexModel([('tags', ASCENDING)]),
+        IndexModel([('message.text', TEXT)])
+    ]
+
     def __init__(self):
         """
         Initialize MongoDB client with configuration from settings.
         Establishes connection to specified database and collection.
+        
+        Note:
+            PyMongo clients are not fork-safe, so a forked worker gets its own
+            client instead of inheriting the parent's connection pool
         """
         mongo_config = settings.XLOGGER_LOG_MONGODB_CONFIG
         uri = f"mongodb://{mongo_config['user']}:{mongo_config['pass']}@{mongo_config['host']}:{mongo_config['port']}/{mongo_config['dbnm']}"
-        self.client = MongoClient(uri)
+        pid = os.getpid()
+        with self._client_lock:
+            client = self._client_by_pid.get(pid)
+            if client is None:
+                # Unacknowledged writes by default: logs are fire-and-forget
+                client_options = {
+                    'w': mongo_config.get('write_concern', 0),
+                    'maxPoolSize': mongo_config.get('max_pool_size', 64)
+                }
+                if client_options['w'] == 0:
+                    client_options.update(journal=False, retryWrites=False)
+                # Log documents are repetitive JSON and compress well on the wire;
+                # PyMongo skips any compressor whose library is not installed
+                compressors = mongo_config.get('compressors')
+                if compressors:
+                    client_options.update(
+                        compressors=compressors,
+                        zlibCompressionLevel=mongo_config.get('zlib_level', 3)
+                    )
+                client = MongoClient(uri, **client_options)
+                self._client_by_pid[pid] = client
+        self.client = client
         self.db = self.client[mongo_config['clnm']]
         self.collection = self.db[mongo_config['tbnm']]
 
@@ -155,6 +279,29 @@ class LogMongoDBClient:
         except Exception as e:
             return False
 
+    def ensure_indexes(self):
+        """
+        Create the query indexes on the log collection, once per collection.
+        
+        Returns:
+            bool: True if the indexes exist, False if creation failed
+            
+        Note:
+            Indexes live on the server, so forked children inherit the
+            already-ensured state; index creation is idempotent across processes
+        """
+        name = self.collection.full_name
+        with self._client_lock:
+            if name in self._indexed_collections:
+                return True
+            try:
+                self.collection.create_indexes(self.INDEXES)
+            except PyMongoError as e:
+                print(f"Failed to create MongoDB log indexes: {e}")
+                return False
+            self._indexed_collections.add(name)
+            return True
+
     def insert_many(self, documents):
         """
         Bulk insert multiple log documents.
@@ -165,11 +312,11 @@ class LogMongoDBClient:
         Returns:
             InsertManyResult: Result of the bulk insertion operation
         """
-        if self.collection:
-            return self.collection.insert_many(documents)
+        if self.collection is not None:
+            return self.collection.insert_many(documents, ordered=False)
         return None
     
-    def find_logs(self, query=None, projection=None, sort=None, limit=None):
+    def find_logs(self, query=None, projection=None, sort=None, limit=None, hint=None, as_list=False):
         """
         Generic log query method with flexible parameters.
         
@@ -178,38 +325,66 @@ class LogMongoDBClient:
             projection (dict): Fields to include/exclude
             sort (list): Sort criteria, e.g., [("time", -1)]
             limit (int): Maximum number of results to return
+            hint (list): Index to force, e.g., [("time", -1)]; ignored unless the
+                query indexes exist
+            as_list (bool): Load all results into a list instead of returning a cursor
             
         Returns:
-            list: Query results matching the criteria
+            Cursor/list: Query results matching the criteria
+            
+        Note:
+            - The cursor fetches results in batches as it is iterated, so large
+              queries are streamed instead of held in memory at once
+            - The query indexes are ensured on first use (once per collection)
         """
-        cursor = self.collection.find(query or {}, projection)
+        indexed = self.ensure_indexes()
+        cursor = self.collection.find(query or {}, projection).batch_size(1000)
         if sort:
             cursor = cursor.sort(sort)
         if limit:
             cursor = cursor.limit(limit)
-        return list(cursor)
+        if hint and indexed:
+            cursor = cursor.hint(hint)
+        return list(cursor) if as_list else cursor
 
-    def find_logs_by_text(self, text, case_sensitive=False, limit=None):
+    def _text_query(self, text, case_sensitive=False):
         """
-        Search logs by text content.
+        Build a text search condition on `message.text`.
         
         Args:
             text (str): Text to search for
             case_sensitive (bool): Whether to perform case-sensitive search
+            
+        Returns:
+            dict: `$text` search on the text index, or a `$regex` scan when the
+            index could not be created
+        """
+        if self.ensure_indexes():
+            return {"$text": {"$search": text, "$caseSensitive": case_sensitive}}
+        return {"message.text": {"$regex": text, "$options": "" if case_sensitive else "i"}}
+
+    def find_logs_by_text(self, text, case_sensitive=False, limit=None, as_list=False):
+        """
+        Search logs by text content.
+        
+        Args:
+            text (str): Words or "quoted phrases" to search for
+            case_sensitive (bool): Whether to perform case-sensitive search
             limit (int): Maximum number of results to return
+            as_list (bool): Return a list instead of a cursor
             
         Returns:
-            list: Logs containing the specified text
+            Cursor/list: Logs containing the specified text
+            
+        Note:
+            Uses the `message.text` text index, so matching is by whole words
+            (any word matches) rather than arbitrary substrings. Falls back to a
+            substring regex scan if the index cannot be created
         """
-        query = {
-            "message.text": {
-                "$regex": text,
-                "$options": "" if case_sensitive else "i"
-            }
-        }
-        return self.find_logs(query, limit=limit)
+        query = self._text_query(text, case_sensitive)
+        return self.find_logs(query, limit=limit, as_list=as_list)
 
-    def find_logs_by_time_range(self, start_time=None, end_time=None, limit=None):
+    def find_logs_by_time_range(self, start_time=None, end_time=None, limit=None, as_list=False):
         """
         Query logs within a specified time range.
         
@@ -217,9 +392,10 @@ class LogMongoDBClient:
             start_time (str): Start time in "YYYY-MM-DD HH:MM:SS" format
             end_time (str): End time in "YYYY-MM-DD HH:MM:SS" format
             limit (int): Maximum number of results to return
+            as_list (bool): Return a list instead of a cursor
             
         Returns:
-            list: Logs within the specified time range
+            Cursor/list: Logs within the specified time range
         """
         query = {}
         if start_time or end_time:
@@ -229,97 +405,118 @@ class LogMongoDBClient:
             if end_time:
                 query["time"]["$lte"] = end_time
         
-        return self.find_logs(query, sort=[("time", -1)], limit=limit)
+        return self.find_logs(query, sort=[("time", -1)], limit=limit, hint=[("time", -1)], as_list=as_list)
 
-    def find_logs_by_level(self, level, limit=None):
+    def find_logs_by_level(self, level, limit=None, as_list=False):
         """
         Query logs by logging level.
         
         Args:
             level (str): Log level (e.g., "INFO", "ERROR")
             limit (int): Maximum number of results to return
+            as_list (bool): Return a list instead of a cursor
             
         Returns:
-            list: Logs matching the specified level
+            Cursor/list: Logs matching the specified level
         """
         query = {"level": level.upper()}
-        return self.find_logs(query, sort=[("time", -1)], limit=limit)
+        return self.find_logs(query, sort=[("time", -1)], limit=limit, as_list=as_list)
 
-    def find_logs_by_category(self, category, limit=None):
+    def find_logs_by_category(self, category, limit=None, as_list=False):
         """
         Query logs by category.
         
         Args:
             category (str): Log category to search for
             limit (int): Maximum number of results to return
+            as_list (bool): Return a list instead of a cursor
             
         Returns:
-            list: Logs matching the specified category
+            Cursor/list: Logs matching the specified category
         """
         query = {"category": category}
-        return self.find_logs(query, sort=[("time", -1)], limit=limit)
+        return self.find_logs(query, sort=[("time", -1)], limit=limit, as_list=as_list)
     
-    def find_logs_by_tags(self, tags, limit=None):
+    def find_logs_by_tags(self, tags, limit=None, as_list=False):
         """
         Query logs by tags.
         
         Args:
             tags (list/str): Tag or list of tags to search for
             limit (int): Maximum number of results to return
+            as_list (bool): Return a list instead of a cursor
             
         Returns:
-            list: Logs containing the specified tags
+            Cursor/list: Logs containing the tag, or any of the listed tags
         """
-        query = {"tags": tags}
-        return self.find_logs(query, sort=[("time", -1)], limit=limit)
+        query = {"tags": self._match_any(tags)}
+        return self.find_logs(query, sort=[("time", -1)], limit=limit, as_list=as_list)
 
-    def find_error_logs(self, limit=None):
+    def find_error_logs(self, limit=None, as_list=False):
         """
         Query error logs.
         
         Args:
             limit (int): Maximum number of results to return
+            as_list (bool): Return a list instead of a cursor
             
         Returns:
-            list: All error level logs
+            Cursor/list: All error level logs
         """
-        return self.find_logs_by_level("ERROR", limit=limit)
+        return self.find_logs_by_level("ERROR", limit=limit, as_list=as_list)
+
+    @staticmethod
+    def _match_any(value, transform=None):
+        """
+        Build a field condition matching a single value or any value of a list.
+        
+        Args:
+            value (list/tuple/str): Value or values to match
+            transform (callable): Optional conversion applied to each value
+            
+        Returns:
+            Query condition for the field
+        """
+        if isinstance(value, (list, tuple)):
+            return {"$in": [transform(v) for v in value] if transform else list(value)}
+        return transform(value) if transform else value
 
     def find_logs_advanced(self, text=None, level=None, category=None, tags=None, 
-                         env=None, start_time=None, end_time=None, limit=None):
+                         env=None, start_time=None, end_time=None, limit=None, as_list=False):
         """
         Advanced log query with multiple criteria.
         
         Args:
-            text (str): Text to search in log messages
-            level (str): Log level
-            category (str): Log category
-            tags (list/str): Log tags
+            text (str): Words or "quoted phrases" to search in log messages (text index)
+            level (list/str): Log level, or list of levels
+            category (list/str): Log category, or list of categories
+            tags (list/str): Log tag, or list of tags (any may match)
             env (str): Environment identifier
             start_time (str): Start time for range query
             end_time (str): End time for range query
             limit (int): Maximum number of results to return
+            as_list (bool): Return a list instead of a cursor
             
         Returns:
-            list: Logs matching all specified criteria
+            Cursor/list: Logs matching all specified criteria
         """
         query = {}
         
         # Text search
         if text:
-            query["message.text"] = {"$regex": text, "$options": "i"}
+            query.update(self._text_query(text))
         
         # Log level
         if level:
-            query["level"] = level.upper()
+            query["level"] = self._match_any(level, str.upper)
         
         # Category
         if category:
-            query["category"] = category
+            query["category"] = self._match_any(category)
         
         # Tags
         if tags:
-            query["tags"] = tags
+            query["tags"] = self._match_any(tags)
         
         # Environment
         if env:
@@ -333,27 +530,53 @@ class LogMongoDBClient:
             if end_time:
                 query["time"]["$lte"] = end_time
         
-        return self.find_logs(query, sort=[("time", -1)], limit=limit)
+        # Pick the most selective index for the fields that are set
+        # ($text queries always use the text index and cannot be hinted)
+        if text:
+            hint = None
+        elif category:
+            hint = [("category", 1), ("time", -1)]
+        elif level:
+            hint = [("level", 1), ("time", -1)]
+        elif tags:
+            hint = [("tags", 1)]
+        elif start_time or end_time:
+            hint = [("time", -1)]
+        else:
+            hint = None
+        
+        return self.find_logs(query, sort=[("time", -1)], limit=limit, hint=hint, as_list=as_list)
 
 class MongoDBLogHandler:
     """
     MongoDB Log Handler for asynchronous log processing.
     Provides buffered writing and batch processing capabilities.
     """
-    def __init__(self, max_batch_size=64, flush_interval=5):
+
+    def __init__(self, max_batch_size=1000, flush_interval=5, mongo_client=None,
+                 max_queue_size=settings.XLOGGER_LOG_MONGODB_QUEUE_MAX, batch_size_cap=5000):
         """
         Initialize MongoDB log handler.
         
         Args:
-            max_batch_size (int): Maximum number of logs to batch before writing
+            max_batch_size (int): Initial number of logs to batch before writing
             flush_interval (int): Maximum time (seconds) to wait before forcing a write
+            mongo_client (LogMongoDBClient): Existing client to reuse (optional)
+            max_queue_size (int): Pending records kept before new ones are dropped
+            batch_size_cap (int): Upper bound for the adaptive batch size
         """
-        self.mongo_client = LogMongoDBClient()
+        self.mongo_client = mongo_client or LogMongoDBClient()
         self.max_batch_size = max_batch_size
+        self.batch_size_cap = max(batch_size_cap, max_batch_size)
+        self.batch_size = max_batch_size  # Current batch size, adapted to flush latency
         self.flush_interval = flush_interval
-        self.log_queue = Queue()
+        self.max_queue_size = max_queue_size
+        self.log_queue = SimpleQueue()
+        self._dropped = 0           # Records dropped (queue full or failed write)
+        self._dropped_reported = 0  # Dropped count already recorded in MongoDB
         self.lock = Lock()
         self.buffer = []
+        self._wakeup = Event()  # Set when a full batch is queued or on close
         
         # Start async processing thread
         self.running = True
@@ -363,56 +586,155 @@ class MongoDBLogHandler:
     def emit(self, log_record: dict):
         """
         Add a log record to the processing queue.
+        Drops the record instead of growing memory when MongoDB falls behind.
         
         Args:
             log_record (dict): Log record to be processed
+            
+        Note:
+            The record is queued as raw BSON: it is encoded once here, is not
+            affected by later changes to the caller's data, and is not
+            re-encoded by insert_many
+        """
+        queued = self.log_queue.qsize()
+        if queued >= self.max_queue_size:
+            self._dropped += 1
+            return
+        self.log_queue.put(_encode_bson(log_record))
+        if queued + 1 >= self.batch_size and not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def stats(self):
+        """
+        Get queue statistics.
+        
+        Returns:
+            dict: Pending and dropped record counts, and the current batch size
+        """
+        return {
+            'queued': self.log_queue.qsize(),
+            'dropped': self._dropped,
+            'max_queue_size': self.max_queue_size,
+            'batch_size': self.batch_size
+        }
+
+    def _dropped_notice(self):
+        """
+        Build a log record reporting newly dropped records, if any.
+        
+        Returns:
+            dict: Warning log record, or None if nothing new was dropped
         """
-        self.log_queue.put(log_record)
+        dropped = self._dropped
+        newly_dropped = dropped - self._dropped_reported
+        if newly_dropped <= 0:
+            return None
+        self._dropped_reported = dropped
+        return {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'version': settings.XLOGGER_LOG_VER,
+            'level': 'WARNING',
+            'category': os.path.basename(__file__),
+            'tags': None,
+            'env': os.getenv('PROJ_ENV', settings.PROJ_ENV),
+            'message': {
+                'text': f"{newly_dropped} log records dropped: MongoDB log queue was full or a write failed",
+                'dropped_total': dropped
+            }
+        }
 
     def _process_logs(self):
         """
         Background thread for processing log records.
         Handles batching and periodic flushing of logs.
+        
+        Note:
+            Sleeps until a producer signals a full batch, the flush deadline
+            passes or the handler is closed, instead of waking for every record
         """
-        last_flush_time = time.time()
+        last_flush_time = time.monotonic()
+        stopping = False
 
-        while self.running:
+        while not stopping:
             try:
-                # Get log records
-                while len(self.buffer) < self.max_batch_size:
-                    try:
-                        log_record = self.log_queue.get(timeout=0.1)
-                        self.buffer.append(log_record)
-                    except Empty:
-                        break
-
-                current_time = time.time()
+                wait_time = self.flush_interval - (time.monotonic() - last_flush_time)
+                self._wakeup.wait(timeout=max(wait_time, 0))
+                self._wakeup.clear()
+                stopping = not self.running
+
+                # Take up to one batch of queued records (all of them when stopping)
+                records = []
+                try:
+                    while len(records) < self.batch_size or stopping:
+                        records.append(self.log_queue.get_nowait())
+                except Empty:
+                    pass
+
+                notice = self._dropped_notice()
+                if notice is not None:
+                    records.append(notice)
+
+                with self.lock:
+                    self.buffer.extend(records)
+                    pending = len(self.buffer)
+
+                current_time = time.monotonic()
                 should_flush = (
-                    len(self.buffer) >= self.max_batch_size or
+                    stopping or
+                    pending >= self.batch_size or
                     (current_time - last_flush_time) >= self.flush_interval
                 )
 
-                if should_flush and self.buffer:
-                    self._flush_buffer()
+                if should_flush:
+                    if pending:
+                        self._adapt_batch_size(self._flush_buffer())
                     last_flush_time = current_time
 
+                # More than one batch may be queued; go round again without waiting
+                if self.log_queue.qsize() >= self.batch_size:
+                    self._wakeup.set()
+
             except Exception as e:
                 print(f"Error processing logs: {e}")
 
+    def _adapt_batch_size(self, flush_duration):
+        """
+        Grow the batch size while flushes are fast and records keep arriving,
+        and shrink it when flushes become slow.
+        
+        Args:
+            flush_duration (float): Seconds the last flush took
+        """
+        if flush_duration < 0.5 * self.flush_interval and self.log_queue.qsize() > 0:
+            self.batch_size = min(int(self.batch_size * 1.5), self.batch_size_cap)
+        elif flush_duration > 2 * self.flush_interval:
+            self.batch_size = max(self.batch_size // 2, 1)
+
     def _flush_buffer(self):
         """
         Write buffered logs to MongoDB.
-        Uses thread-safe operations to prevent data corruption.
+        The buffer is swapped out under the lock, so the insert runs without
+        holding it and new records can be buffered meanwhile.
+        
+        Returns:
+            float: Seconds spent writing the batch
+            
+        Note:
+            A batch that fails to write is counted as dropped
         """
-        if not self.buffer:
-            return
-
         with self.lock:
-            try:
-                self.mongo_client.collection.insert_many(self.buffer)
-                self.buffer = []
-            except Exception as e:
-                print(f"Error flushing logs to MongoDB: {e}")
+            batch, self.buffer = self.buffer, []
+
+        if not batch:
+            return 0.0
+
+        start_time = time.monotonic()
+        try:
+            self.mongo_client.insert_many(batch)
+        except Exception as e:
+            self._dropped += len(batch)
+            print(f"Error flushing logs to MongoDB: {e}")
+        return time.monotonic() - start_time
 
     def close(self):
         """
@@ -420,6 +742,7 @@ class MongoDBLogHandler:
         Ensures all pending logs are written before shutdown.
         """
         self.running = False
+        self._wakeup.set()  # Wake the worker if it is waiting
         self.worker_thread.join()
         self._flush_buffer()  # Final flush of buffer
 
@@ -427,8 +750,12 @@ class CustomJSONLogger:
     """
     Singleton JSON logger with file, console, and MongoDB output support.
     Provides formatted logging with metadata and multiple output channels.
+    
+    Attributes:
+        _instances (dict): One logger per process, keyed by PID
     """
-    _instance = None
+    _instances = {}
+    _instances_lock = Lock()
 
     @classmethod
     def get_instance(cls, log_dir=settings.XLOGGER_LOG_DIR, 
@@ -445,11 +772,34 @@ class CustomJSONLogger:
             console_output (bool): Enable console output
             
         Returns:
-            CustomJSONLogger: Singleton logger instance
+            CustomJSONLogger: Singleton logger instance for the current process
         """
-        if cls._instance is None:
-            cls._instance = cls(log_dir, log_filename, version, console_output)
-        return cls._instance
+        pid = os.getpid()
+        with cls._instances_lock:
+            instance = cls._instances.get(pid)
+            if instance is None:
+                instance = cls._instances[pid] = cls(log_dir, log_filename, version, console_output)
+        return instance
+
+    @classmethod
+    def _after_fork_in_child(cls):
+        """
+        Mark loggers inherited through fork() as needing new background workers.
+        
+        Note:
+            The child inherits the parent's queues and MongoDB client but not the
+            threads serving them. No I/O is done here, since this runs in every
+            forked child before any user code; workers are restarted by the
+            first log() call in the child instead
+        """
+        cls._instances_lock = Lock()
+        LogMongoDBClient._client_lock = Lock()
+        instances = list(cls._instances.values())
+        cls._instances.clear()
+        for instance in instances:
+            instance._restart_lock = Lock()
+            instance._stale = True
+            cls._instances[os.getpid()] = instance
 
     def __init__(self, log_dir=settings.XLOGGER_LOG_DIR, 
                  log_filename=settings.XLOGGER_LOG_FILENAME, 
@@ -468,8 +818,17 @@ class CustomJSONLogger:
         self.default_version = version
         self.log_dir = log_dir
 
+        # Per-record constants, resolved once instead of on every log call
+        self._env = os.getenv('PROJ_ENV', settings.PROJ_ENV)
+        self._level_names = {
+            level: logging.getLevelName(level)
+            for level in (logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL)
+        }
+        self._time_cache = (None, '')  # (epoch second, formatted second)
+
         self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(settings.XLOGGER_LOG_LEVEL)
+        self.logger.propagate = False
 
         # Create log directory if not exists
         os.makedirs(self.log_dir, exist_ok=True)
@@ -485,23 +844,91 @@ class CustomJSONLogger:
             encoding="utf-8"
         )
         self.file_handler.setFormatter(file_formatter)
-        self.logger.addHandler(self.file_handler)
+        output_handlers = [self.file_handler]
 
         # Configure console handler with colored output
         if console_output:
-            console_formatter = ColoredFormatter('%(message)s')  # Format for console output
             console_handler = logging.StreamHandler()
+            console_formatter = ColoredFormatter(  # Format for console output
+                '%(console_msg)s',
+                use_color=console_handler.stream.isatty()
+            )
             console_handler.setFormatter(console_formatter)
-            self.logger.addHandler(console_handler)
+            output_handlers.append(console_handler)
+        self._output_handlers = output_handlers
+
+        self._queue_handler = None
+        self._restart_lock = Lock()
+        self._stale = False  # Set in forked children until workers are restarted
+        self._start_listener()
 
         # Initialize MongoDB handler if enabled
         self.mongo_handler = None
         if settings.XLOGGER_LOG_MONGODB_ENABLE:
             mongo_client = LogMongoDBClient()
             if mongo_client.check_connection():
-                self.mongo_handler = MongoDBLogHandler()
+                mongo_client.ensure_indexes()
+                self.mongo_handler = MongoDBLogHandler(mongo_client=mongo_client)
             else:
                 print("Failed to connect to MongoDB. Disabling MongoDB logging.")
+        atexit.register(self.close)
+
+    def _start_listener(self):
+        """
+        Start the background listener thread for the file and console handlers.
+        Replaces any previous one, e.g. one inherited through fork().
+        """
+        # Hand records to a background listener thread that owns the file and
+        # console handlers, so callers never wait on disk or terminal I/O
+        if self._queue_handler is not None:
+            self.logger.removeHandler(self._queue_handler)
+        log_queue = SimpleQueue()
+        self._queue_handler = QueueHandler(log_queue)
+        self.logger.addHandler(self._queue_handler)
+        self._listener = QueueListener(log_queue, *self._output_handlers, respect_handler_level=True)
+        self._listener.start()
+
+    def _restart_after_fork(self):
+        """
+        Restart background workers in a forked child, on its first log call.
+        
+        Note:
+            The MongoDB connection and indexes were already checked by the parent,
+            so the child only creates its own client and handler
+        """
+        with self._restart_lock:
+            if not self._stale:
+                return
+            self._start_listener()
+            if self.mongo_handler is not None:
+                self.mongo_handler = MongoDBLogHandler(mongo_client=LogMongoDBClient())
+            self._stale = False
+
+    @staticmethod
+    def _find_caller_frame():
+        """
+        Get the first stack frame outside this module.
+        
+        Returns:
+            frame: Caller's frame, or None if the whole stack is in this module
+        """
+        frame = sys._getframe(1)
+        while frame is not None and frame.f_code.co_filename == __file__:
+            frame = frame.f_back
+        return frame
+
+    @staticmethod
+    def _frame_class_name(frame):
+        """
+        Get the class name of `self` in a frame.
+        
+        Returns:
+            str: Class name or None if the frame is not a method call
+        """
+        calling_self = frame.f_locals.get('self') if frame is not None else None
+        if calling_self is not None:
+            return calling_self.__class__.__name__
+        return None
 
     def get_calling_class(self):
         """
@@ -510,12 +937,7 @@ class CustomJSONLogger:
         Returns:
             str: Name of the calling class or None if not called from a class
         """
-        current_frame = inspect.currentframe()
-        calling_frame = inspect.getouterframes(current_frame, 2)
-        calling_class = calling_frame[2].frame.f_locals.get('self', None)
-        if calling_class:
-            return calling_class.__class__.__name__
-        return None
+        return self._frame_class_name(self._find_caller_frame())
     
     def safe_str(self, obj):
         """
@@ -527,11 +949,31 @@ class CustomJSONLogger:
         Returns:
             str: Safe string representation of the object
         """
+        if type(obj) is str:
+            return obj
         try:
             return str(obj)
         except UnicodeEncodeError:
             return obj.encode('utf-8', errors='ignore').decode('utf-8')
 
+    def _format_time(self, t):
+        """
+        Format a timestamp as "YYYY-MM-DD HH:MM:SS.mmm" in local time.
+        The seconds part is only re-formatted when the second changes.
+        
+        Args:
+            t (float): Epoch timestamp
+            
+        Returns:
+            str: Formatted time string
+        """
+        second = int(t)
+        cached = self._time_cache
+        if cached[0] != second:
+            cached = (second, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second)))
+            self._time_cache = cached
+        return f"{cached[1]}.{int((t - second) * 1000):03d}"
+
     def log(self, message, data=None, log_level=None, category=None, version=None, tags=None):
         """
         Main logging method with support for structured data and metadata.
@@ -546,34 +988,39 @@ class CustomJSONLogger:
         """
         if log_level is None:
             log_level = logging.DEBUG
+        if not self.logger.isEnabledFor(log_level):
+            return
+        if self._stale:
+            self._restart_after_fork()
+
+        # Look up the caller once; it provides the category and error location
+        caller = None
+        if category is None or log_level == logging.ERROR:
+            caller = self._find_caller_frame()
 
         if category is None:
-            category = self.get_caller_script_name()
+            category = os.path.basename(caller.f_code.co_filename) if caller is not None else None
 
-        # Get environment from settings or environment variable
-        env = os.getenv('PROJ_ENV', settings.PROJ_ENV)
-        
         # Format current time with milliseconds precision
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        current_time = self._format_time(time.time())
 
         # Construct log data structure
         log_data = {
             'time': current_time,
             'version': version or self.default_version,
-            'level': logging.getLevelName(log_level),
+            'level': self._level_names.get(log_level) or logging.getLevelName(log_level),
             'category': category,
             'tags': tags,
-            'env': env,
+            'env': self._env,
             'message': {
-                'text': self.safe_str(message) if isinstance(message, dict) else self.safe_str(message)
+                'text': message if type(message) is str else self.safe_str(message)
             }
         }
 
         # Add error details for ERROR level logs
-        if log_level == logging.ERROR:
-            caller = self.logger.findCaller()
-            log_data['message']['line'] = f"{caller[1]}:{caller[2]}"
-            calling_class = self.get_calling_class()
+        if log_level == logging.ERROR and caller is not None:
+            log_data['message']['line'] = f"{caller.f_code.co_filename}:{caller.f_lineno}"
+            calling_class = self._frame_class_name(caller)
             if calling_class:
                 log_data['message']['classname'] = calling_class
 
@@ -585,42 +1032,47 @@ class CustomJSONLogger:
                 log_data['message']['data'] = data
 
         # Prepare JSON formatted log message for file handler
-        json_log_message = json.dumps(log_data, ensure_ascii=False, separators=(',', ':'))
+        json_log_message = _dumps_log(log_data)
         
         # Prepare formatted log message for console handler
         console_log_message = f"{log_data['time']} - {log_data['level']} - {log_data['category']}: {log_data['message']['text']}"
         
-        # Record to file and console separately
-        for handler in self.logger.handlers:
-            if isinstance(handler, CustomTimedRotatingFileHandler):
-                handler.emit(logging.LogRecord(
-                    name=self.logger.name,
-                    level=log_level,
-                    pathname='',
-                    lineno=0,
-                    msg=json_log_message,
-                    args=(),
-                    exc_info=None
-                ))
-            elif isinstance(handler, logging.StreamHandler):
-                handler.emit(logging.LogRecord(
-                    name=self.logger.name,
-                    level=log_level,
-                    pathname='',
-                    lineno=0,
-                    msg=console_log_message,
-                    args=(),
-                    exc_info=None
-                ))
+        # Queue one record; the file handler writes its JSON message and the
+        # console handler formats `console_msg`. The record is built directly
+        # so logging does not walk the stack again for caller info it never uses
+        record = self.logger.makeRecord(
+            self.logger.name, log_level, "(unknown file)", 0, json_log_message, None, None,
+            extra={'console_msg': console_log_message}
+        )
+        self.logger.handle(record)
 
         # Add MongoDB logging if enabled
         if self.mongo_handler:
             self.mongo_handler.emit(log_data)
 
+    def close(self):
+        """
+        Flush and stop background log processing.
+        Safe to call more than once.
+        """
+        if getattr(self, '_stale', False):
+            # Workers inherited through fork() belong to the parent; drop them
+            # without flushing the parent's pending records a second time
+            self._listener = None
+            self.mongo_handler = None
+            return
+        listener = getattr(self, '_listener', None)
+        if listener is not None:
+            self._listener = None
+            listener.stop()
+        mongo_handler = getattr(self, 'mongo_handler', None)
+        if mongo_handler:
+            self.mongo_handler = None
+            mongo_handler.close()
+
     def __del__(self):
-        """Ensure proper cleanup of MongoDB handler on object destruction"""
-        if self.mongo_handler:
-            self.mongo_handler.close()
+        """Ensure proper cleanup of log handlers on object destruction"""
+        self.close()
 
     @staticmethod
     def get_caller_script_name():
@@ -630,34 +1082,40 @@ class CustomJSONLogger:
         Returns:
             str: Name of the calling script file
         """
-        frame = inspect.currentframe()
-        while frame:
-            filename = frame.f_code.co_filename
-            if filename != __file__:
-                return os.path.basename(filename)
-            frame = frame.f_back
+        frame = CustomJSONLogger._find_caller_frame()
+        if frame is not None:
+            return os.path.basename(frame.f_code.co_filename)
         return None
 
     # Convenience methods for different log levels
     def warning(self, message, data=None, category=None, version=None, tags=None):
         """Log a warning message"""
-        self.log(message, data, log_level=logging.WARNING, category=category, version=version, tags=tags)
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.log(message, data, log_level=logging.WARNING, category=category, version=version, tags=tags)
 
     def error(self, message, data=None, category=None, version=None, tags=None):
         """Log an error message"""
-        self.log(message, data, log_level=logging.ERROR, category=category, version=version, tags=tags)
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.log(message, data, log_level=logging.ERROR, category=category, version=version, tags=tags)
 
     def exceptions(self, message, category=None, version=None, tags=None):
         """Log an exception message"""
-        self.log(message, log_level=logging.ERROR, category=category, version=version, tags=tags)
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.log(message, log_level=logging.ERROR, category=category, version=version, tags=tags)
 
     def info(self, message, data=None, category=None, version=None, tags=None):
         """Log an info message"""
-        self.log(message, data, log_level=logging.INFO, category=category, version=version, tags=tags)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.log(message, data, log_level=logging.INFO, category=category, version=version, tags=tags)
 
     def debug(self, message, data=None, category=None, version=None, tags=None):
         """Log a debug message"""
-        self.log(message, data, log_level=logging.DEBUG, category=category, version=version, tags=tags)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.log(message, data, log_level=logging.DEBUG, category=category, version=version, tags=tags)
+
+# Forked children (e.g. multiprocessing workers) get their own log workers
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=CustomJSONLogger._after_fork_in_child)
 
 # Create global logger instance
 logger = CustomJSONLogger.get_instance()